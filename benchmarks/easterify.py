@@ -0,0 +1,69 @@
+"""
+Time the vectorised easterify effect against the per-pixel implementation it replaced.
+
+Both run on a 1024x1024 avatar, the size the avatar commands resize to, and must produce identical pixels.
+
+Run from the repository root with `python -m benchmarks.easterify`.
+"""
+import time
+from collections.abc import Callable
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from bot.exts.avatar_modification._effects import PfpEffects
+
+AVATAR_SIZE = (1024, 1024)
+ROUNDS = 3
+
+
+def legacy_easterify(image: Image.Image) -> Image.Image:
+    """Recolour `image` like `PfpEffects.easterify_effect` did before it was vectorised, without the overlay."""
+    alpha = image.getchannel("A").getdata()
+    image = ImageOps.posterize(image.convert("RGB"), 6)
+
+    data = image.getdata()
+    easterified = {colour: PfpEffects.closest(colour) for colour in set(data)}
+    im = Image.new("RGBA", image.size)
+    im.putdata([(*easterified[colour], alpha[index]) for index, colour in enumerate(data)])
+    return im
+
+
+def vectorised_easterify(image: Image.Image) -> Image.Image:
+    """Recolour `image` with `PfpEffects.easterify_effect`, with an empty overlay."""
+    return PfpEffects.easterify_effect(image, Image.new("RGBA", (1, 1), (0, 0, 0, 0)))
+
+
+def sample_avatar(seed: int = 0) -> Image.Image:
+    """Generate a noisy RGBA avatar; noise has far more distinct colours than a real avatar, a worst case."""
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (*AVATAR_SIZE, 4), dtype=np.uint8), "RGBA")
+
+
+def time_effect(effect: Callable[[Image.Image], Image.Image], image: Image.Image) -> float:
+    """Return the best time of `ROUNDS` runs of `effect`, in seconds."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        effect(image.copy())
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Check both implementations agree, then print their timings."""
+    start = time.perf_counter()
+    PfpEffects.easter_lookup_table()
+    print(f"lookup table: {time.perf_counter() - start:.3f}s, built once per process")
+
+    avatar = sample_avatar()
+    if legacy_easterify(avatar.copy()).tobytes() != vectorised_easterify(avatar.copy()).tobytes():
+        raise SystemExit("The vectorised effect doesn't match the per-pixel one.")
+
+    legacy = time_effect(legacy_easterify, avatar)
+    vectorised = time_effect(vectorised_easterify, avatar)
+    print(f"per-pixel: {legacy:.3f}s | vectorised: {vectorised:.3f}s | speedup: {legacy / vectorised:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Load test the Hangman cog against an in-process stand-in for the Discord gateway.
+
+Thousands of games run concurrently, each played by a scripted guesser. For every run the harness reports the
+per-guess latency (from a guess being dispatched to the game waiting for the next one), the event loop lag
+seen by a ticking task, and how much memory each game needs.
+
+Run from the repository root with `python -m benchmarks.hangman_load [--games 10 100 1000 5000]`.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from bot.exts.fun.hangman import Hangman
+from bot.exts.fun.hangman._sessions import SessionKey, SessionRegistry
+from bot.exts.fun.hangman._stats import HangmanStats
+from bot.exts.fun.hangman._words import WORDS
+from test.fakes import FakeChannel, FakeContext, FakeMessage, FakeRedisSession, FakeUser
+
+# Letters in order of how common they are in English, which is the order the scripted players guess in
+GUESS_ORDER = "etaoinshrdlcumwfgypbvkjxqz"
+GAMES_PER_CHANNEL = 50
+LAG_INTERVAL = 0.005
+
+class _SignallingQueue:
+    """Wraps a game's guess queue to signal whenever the game is ready for its next guess."""
+
+    __slots__ = ("queue", "ready")
+
+    def __init__(self, queue: asyncio.Queue, ready: asyncio.Event):
+        self.queue = queue
+        self.ready = ready
+
+    async def get(self) -> FakeMessage:
+        self.ready.set()
+        return await self.queue.get()
+
+
+class InstrumentedRegistry(SessionRegistry):
+    """A session registry exposing, per game, an event that is set while the game waits for a guess or has ended."""
+
+    def __init__(self):
+        super().__init__()
+        self.ready: dict[SessionKey, asyncio.Event] = {}
+
+    def ready_event(self, key: SessionKey) -> asyncio.Event:
+        """Return the readiness event of the game at `key`, which may not have started yet."""
+        return self.ready.setdefault(key, asyncio.Event())
+
+    @contextmanager
+    def open(self, channel_id: int, author_id: int) -> Iterator[_SignallingQueue]:
+        """Open a session whose queue signals readiness."""
+        ready = self.ready_event((channel_id, author_id))
+        try:
+            with super().open(channel_id, author_id) as queue:
+                yield _SignallingQueue(queue, ready)
+        finally:
+            ready.set()
+
+
+@dataclass
+class LoadReport:
+    """Results of one load test run."""
+
+    games: int
+    seconds: float
+    results: Counter
+    latencies: list[float] = field(default_factory=list)
+    lags: list[float] = field(default_factory=list)
+    peak_bytes_per_game: float | None = None
+
+    @staticmethod
+    def _percentile(samples: list[float], percentile: int) -> float:
+        if len(samples) < 2:
+            return samples[0] if samples else 0.0
+        return statistics.quantiles(samples, n=100, method="inclusive")[percentile - 1]
+
+    @property
+    def guesses(self) -> int:
+        """Number of guesses processed."""
+        return len(self.latencies)
+
+    def summary(self) -> dict[str, float]:
+        """Return the headline numbers of the run, with times in milliseconds."""
+        return {
+            "games": self.games,
+            "guesses": self.guesses,
+            "won": self.results["You won!"],
+            "lost": self.results["You lost."],
+            "seconds": self.seconds,
+            "guess p50 ms": self._percentile(self.latencies, 50) * 1000,
+            "guess p99 ms": self._percentile(self.latencies, 99) * 1000,
+            "lag p99 ms": self._percentile(self.lags, 99) * 1000,
+            "lag max ms": max(self.lags, default=0.0) * 1000,
+        }
+
+
+async def _play(cog: Hangman, ctx: FakeContext, latencies: list[float], *args: str) -> None:
+    """Start a game for `ctx` and guess letters in `GUESS_ORDER` until it ends."""
+    registry: InstrumentedRegistry = cog.sessions
+    key = (ctx.channel.id, ctx.author.id)
+    ready = registry.ready_event(key)
+    game = asyncio.create_task(cog.hangman.callback(cog, ctx, *args))
+    # Covers games that end before ever waiting for a guess, such as when no word matches the arguments.
+    game.add_done_callback(lambda _: ready.set())
+
+    await ready.wait()
+    for letter in GUESS_ORDER:
+        if key not in registry:
+            break
+        ready.clear()
+        start = time.perf_counter()
+        cog.sessions.dispatch(FakeMessage(ctx.channel, ctx.author, letter))
+        await ready.wait()
+        latencies.append(time.perf_counter() - start)
+
+    await game
+    del registry.ready[key]
+
+
+async def _measure_lag(lags: list[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        scheduled = loop.time()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(loop.time() - scheduled - LAG_INTERVAL)
+
+
+async def run_load_test(games: int, *args: str, trace_memory: bool = False) -> LoadReport:
+    """Play `games` concurrent games of `.hangman *args` and report how the cog coped."""
+    await WORDS.get()
+
+    cog = Hangman(bot=None)
+    cog.sessions = InstrumentedRegistry()
+    cog.stats = HangmanStats(FakeRedisSession())
+    results = Counter()
+    channels = [FakeChannel(results) for _ in range(max(games // GAMES_PER_CHANNEL, 1))]
+    contexts = [FakeContext(channels[index % len(channels)], FakeUser()) for index in range(games)]
+    report = LoadReport(games=games, seconds=0.0, results=results)
+
+    if trace_memory:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_lag(report.lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(_play(cog, ctx, report.latencies, *args) for ctx in contexts))
+    await cog.cog_unload()
+    report.seconds = time.perf_counter() - start
+    stop.set()
+    await lag_task
+
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report.peak_bytes_per_game = (peak - baseline) / games
+
+    return report
+
+
+async def main(game_counts: list[int], args: list[str]) -> None:
+    """Print a report for each number of concurrent games."""
+    for games in game_counts:
+        report = await run_load_test(games, *args)
+        memory = await run_load_test(games, *args, trace_memory=True)
+        summary = report.summary()
+        summary["peak KiB/game"] = memory.peak_bytes_per_game / 1024
+        print(" | ".join(f"{name} {value:,.2f}" if isinstance(value, float) else f"{name} {value:,}"
+                         for name, value in summary.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, nargs="+", default=[10, 100, 1_000, 5_000])
+    parser.add_argument("hangman_args", nargs="*", help="arguments passed to the hangman command")
+    cli_args = parser.parse_args()
+    asyncio.run(main(cli_args.games, cli_args.hangman_args))
@@ -0,0 +1,89 @@
+"""
+Compare the per-message cost of routing hangman guesses with `wait_for` checks and with the session registry.
+
+Run from the repository root with `python -m benchmarks.hangman_sessions`.
+"""
+import random
+import timeit
+from collections.abc import Callable
+
+from bot.exts.fun.hangman._sessions import SessionRegistry
+
+GAME_COUNTS = (1, 10, 100, 1_000)
+MESSAGES = 2_000
+
+
+class _Snowflake:
+    """Stand-in for a discord model; like `discord.abc.Snowflake`, equality is identity of the same object."""
+
+    __slots__ = ("id",)
+
+    def __init__(self, id_: int):
+        self.id = id_
+
+
+class _Message:
+    __slots__ = ("author", "channel", "content")
+
+    def __init__(self, channel: _Snowflake, author: _Snowflake):
+        self.channel = channel
+        self.author = author
+        self.content = "e"
+
+
+def _wait_for_dispatch(listeners: list, message: _Message) -> None:
+    """Mirror of `discord.Client.dispatch`: every pending check is evaluated, matching listeners are resolved."""
+    removed = []
+    for index, (result, condition) in enumerate(listeners):
+        if condition(message):
+            result.append(message)
+            removed.append(index)
+    for index in reversed(removed):
+        # A game immediately waits for its next guess, so its listener is registered again.
+        listeners.append(listeners.pop(index))
+
+
+def _make_check(channel: _Snowflake, author: _Snowflake) -> Callable[[_Message], bool]:
+    def check(msg: _Message) -> bool:
+        return msg.author == author and msg.channel == channel
+    return check
+
+
+def run(game_count: int) -> tuple[float, float]:
+    """Return the per-message cost in microseconds of both routing strategies for `game_count` games."""
+    channels = [_Snowflake(i) for i in range(max(game_count // 10, 1))]
+    players = [(random.choice(channels), _Snowflake(10_000 + i)) for i in range(game_count)]
+    messages = [_Message(*random.choice(players)) for _ in range(MESSAGES)]
+
+    listeners = [([], _make_check(channel, author)) for channel, author in players]
+    registry = SessionRegistry()
+    queues = [registry.open(channel.id, author.id).__enter__() for channel, author in players]
+
+    def with_wait_for() -> None:
+        for message in messages:
+            _wait_for_dispatch(listeners, message)
+        for result, _ in listeners:
+            result.clear()
+
+    def with_registry() -> None:
+        for message in messages:
+            registry.dispatch(message)
+        for queue in queues:
+            while not queue.empty():
+                queue.get_nowait()
+
+    wait_for_time = min(timeit.repeat(with_wait_for, number=1, repeat=5))
+    registry_time = min(timeit.repeat(with_registry, number=1, repeat=5))
+    return wait_for_time / MESSAGES * 1e6, registry_time / MESSAGES * 1e6
+
+
+def main() -> None:
+    """Print the per-message routing cost for each game count."""
+    print(f"{'games':>6} {'wait_for (us/msg)':>18} {'registry (us/msg)':>18}")
+    for game_count in GAME_COUNTS:
+        wait_for_cost, registry_cost = run(game_count)
+        print(f"{game_count:>6} {wait_for_cost:>18.2f} {registry_cost:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Time the hangman difficulty scorer on the shipped corpus and on larger synthetic corpora.
+
+Run from the repository root with `python -m benchmarks.hangman_solver`.
+"""
+import random
+import time
+
+from bot.exts.fun.hangman._solver import score_words
+from bot.exts.fun.hangman._words import read_corpus
+
+SYNTHETIC_SIZES = (10_000, 100_000)
+
+
+def synthetic_corpus(size: int) -> list[str]:
+    """Generate roughly `size` distinct words with an English-like skew towards common letters."""
+    random.seed(size)
+    letters = "etaoinshrdlcumwfgypbvkjxqz"
+    weights = range(len(letters), 0, -1)
+    words = {
+        "".join(random.choices(letters, weights=weights, k=random.randint(3, 14)))
+        for _ in range(size)
+    }
+    return sorted(words)
+
+
+def time_scoring(words: list[str]) -> float:
+    """Return how long scoring `words` takes, in seconds."""
+    start = time.perf_counter()
+    score_words(words)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Print the scoring time for each corpus."""
+    corpora = {"shipped": list(read_corpus())}
+    corpora.update({f"synthetic {size:,}": synthetic_corpus(size) for size in SYNTHETIC_SIZES})
+
+    print(f"{'corpus':>18} {'words':>8} {'seconds':>8}")
+    for name, words in corpora.items():
+        print(f"{name:>18} {len(words):>8,} {time_scoring(words):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
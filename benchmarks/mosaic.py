@@ -0,0 +1,139 @@
+"""
+Time the mosaic effect against the original crop and paste implementation.
+
+Up to `MOSAIC_PASTE_MAX_SQUARES` tiles the effect crops and pastes too, just without splitting the image into a list
+first; past that it shuffles the tiles as arrays.
+
+Both run on a 1024x1024 avatar, the size the avatar commands resize to, and must produce the same tiles.
+
+Run from the repository root with `python -m benchmarks.mosaic`.
+"""
+import math
+import random
+import time
+from collections.abc import Callable
+
+import numpy as np
+from PIL import Image
+
+from bot.exts.avatar_modification._effects import PfpEffects
+
+AVATAR_SIZE = (1024, 1024)
+SQUARE_COUNTS = (16, 256, 1_024, 10_000)
+ROUNDS = 3
+
+
+def split_image(img: Image.Image, squares: int) -> list[Image.Image]:
+    """Crop `img` into `squares` tiles, row by row, as `PfpEffects.split_image` used to."""
+    width, heigth = img.size
+
+    xy = math.sqrt(squares)
+
+    x_frac = width // xy
+    y_frac = heigth // xy
+
+    left, top, right, bottom, = 0, 0, x_frac, y_frac
+
+    new_imgs = []
+
+    for index in range(squares):
+        new_img = img.crop((left, top, right, bottom))
+        new_imgs.append(new_img)
+
+        if (index + 1) % xy == 0:
+            top += y_frac
+            bottom += y_frac
+            left = 0
+            right = x_frac
+        else:
+            left += x_frac
+            right += x_frac
+
+    return new_imgs
+
+
+def join_images(images: list[Image.Image]) -> Image.Image:
+    """Shuffle `images` and paste them onto a square grid, as `PfpEffects.join_images` used to."""
+    random.shuffle(images)
+    single_img = images[0]
+
+    single_wdith = single_img.size[0]
+    single_height = single_img.size[1]
+
+    multiplier = int(math.sqrt(len(images)))
+
+    total_width = multiplier * single_wdith
+    total_height = multiplier * single_height
+
+    new_image = Image.new("RGBA", (total_width, total_height), (250, 250, 250))
+
+    width_multiplier = 0
+    height = 0
+
+    squares = math.sqrt(len(images))
+
+    for index, image in enumerate(images):
+        width = single_wdith * width_multiplier
+
+        new_image.paste(image, (width, height))
+
+        width_multiplier += 1
+
+        if (index + 1) % squares == 0:
+            width_multiplier = 0
+            height += single_height
+
+    return new_image
+
+
+def legacy_mosaic(image: Image.Image, squares: int) -> Image.Image:
+    """Shuffle the tiles of `image` by cropping and pasting each one, as `PfpEffects.mosaic_effect` used to."""
+    return join_images(split_image(image, squares))
+
+
+def tiles(image: Image.Image, squares: int) -> list[bytes]:
+    """Return the pixels of each tile of `image`, in sorted order, to compare mosaics regardless of the shuffle."""
+    per_side = int(squares ** 0.5)
+    width, height = image.size[0] // per_side, image.size[1] // per_side
+    return sorted(
+        image.crop((column * width, row * height, (column + 1) * width, (row + 1) * height)).tobytes()
+        for row in range(per_side)
+        for column in range(per_side)
+    )
+
+
+def sample_avatar(seed: int = 0) -> Image.Image:
+    """Generate a noisy RGBA avatar, so that every tile is distinct."""
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (*AVATAR_SIZE, 4), dtype=np.uint8), "RGBA")
+
+
+def time_effect(effect: Callable[[Image.Image, int], Image.Image], image: Image.Image, squares: int) -> float:
+    """Return the best time of `ROUNDS` runs of `effect`, in seconds."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        effect(image, squares)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Check both implementations agree for each number of squares, then print their timings."""
+    avatar = sample_avatar()
+    for squares in SQUARE_COUNTS:
+        legacy_result = legacy_mosaic(avatar, squares)
+        result = PfpEffects.mosaic_effect(avatar, squares)
+        if result.size != legacy_result.size or tiles(result, squares) != tiles(legacy_result, squares):
+            raise SystemExit(f"The mosaics of {squares} squares don't have the same tiles.")
+
+        legacy = time_effect(legacy_mosaic, avatar, squares)
+        current = time_effect(PfpEffects.mosaic_effect, avatar, squares)
+        print(
+            f"{squares:>6,} squares | crop and paste: {legacy * 1000:8.1f}ms | now: {current * 1000:6.1f}ms"
+            f" | speedup: {legacy / current:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Time snake cards composited from cached layers against building every layer for each card.
+
+Cards are made for pictures of a few aspect ratios, with the same back for both implementations, which must
+produce the same image. Encoding the card is left out, since it's the same for both.
+
+Run from the repository root with `python -m benchmarks.snake_card`.
+"""
+import random
+import textwrap
+import time
+from collections.abc import Callable
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from bot.exts.fun.snakes._card import CARD, compose_card
+
+PICTURE_SIZES = ((640, 480), (800, 1200), (347, 2000))
+INFO = (
+    "The king cobra is a venomous snake species of the family Elapidae, endemic to forests from India through "
+    "Southeast Asia. It is the world's longest venomous snake. Adult king cobras are 3.18 to 4 m long."
+)
+ROUNDS = 20
+
+
+def legacy_card(image_bytes: bytes, info: str) -> Image.Image:
+    """Generate a card by building each of its layers, as `Snakes._generate_card` used to."""
+    snake = Image.open(BytesIO(image_bytes))
+
+    icon_width = 347
+    icon_height = int((icon_width / snake.width) * snake.height)
+    frame_copies = icon_height // CARD["frame"].height + 1
+    snake.thumbnail((icon_width, icon_height))
+
+    main_height = icon_height + CARD["top"].height + CARD["bottom"].height
+    main_width = CARD["frame"].width
+
+    foreground = Image.new("RGBA", (main_width, main_height), (0, 0, 0, 0))
+    foreground.paste(CARD["top"], (0, 0))
+    for offset in range(frame_copies):
+        position = (0, CARD["top"].height + offset * CARD["frame"].height)
+        foreground.paste(CARD["frame"], position)
+    foreground.paste(snake, (36, CARD["top"].height))
+    foreground.paste(CARD["bottom"], (0, CARD["top"].height + icon_height))
+
+    back = random.choice(CARD["backs"])
+    back_copies = main_height // back.height + 1
+    full_image = Image.new("RGBA", (main_width, main_height), (0, 0, 0, 0))
+    for offset in range(back_copies):
+        full_image.paste(back, (16, 16 + offset * back.height))
+    full_image.paste(foreground, (0, 0), foreground)
+
+    description = ".".join(info.split(".")[:2]) + "."
+    margin = 36
+    offset = CARD["top"].height + icon_height + margin
+
+    rectangle = Image.new("RGBA", (main_width, main_height), (0, 0, 0, 0))
+    rect = ImageDraw.Draw(rectangle)
+    rect.rectangle((margin, offset, main_width - margin, main_height - margin), fill=(63, 63, 63, 128))
+    full_image.paste(rectangle, (0, 0), mask=rectangle)
+
+    draw = ImageDraw.Draw(full_image)
+    for line in textwrap.wrap(description, 36):
+        draw.text((margin + 4, offset), line, font=CARD["font"])
+        _left, top, _right, bottom = CARD["font"].getbbox(line)
+        offset += bottom - top + 4
+
+    return full_image
+
+
+def sample_picture(size: tuple[int, int], seed: int = 0) -> bytes:
+    """Generate a noisy JPEG picture of the given size."""
+    rng = np.random.default_rng(seed)
+    picture = BytesIO()
+    Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8), "RGB").save(picture, "JPEG")
+    return picture.getvalue()
+
+
+def time_card(compose: Callable[[bytes, str], Image.Image], picture: bytes) -> float:
+    """Return the best time of `ROUNDS` cards made with `compose`, in seconds."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        compose(picture, INFO)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Check both implementations agree for each picture size, then print their timings."""
+    for size in PICTURE_SIZES:
+        picture = sample_picture(size)
+        for seed in range(len(CARD["backs"])):
+            random.seed(seed)
+            expected = legacy_card(picture, INFO)
+            random.seed(seed)
+            if compose_card(picture, INFO).tobytes() != expected.tobytes():
+                raise SystemExit(f"The cards for a {size[0]}x{size[1]} picture don't match.")
+
+        legacy = time_card(legacy_card, picture)
+        cached = time_card(compose_card, picture)
+        print(
+            f"{size[0]:>4}x{size[1]:<4} picture | all layers: {legacy * 1000:6.1f}ms"
+            f" | cached layers: {cached * 1000:6.1f}ms | speedup: {legacy / cached:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Time resolving snake names with the name index against scoring every name as `Snake.convert` used to.
+
+Queries are a mix of exact names, prefixes of a word of a name, and misspelt names. Both implementations must
+offer the same names for the prefixes and misspelt queries, though the index offers names with a word starting
+with the query first.
+
+Run from the repository root with `python -m benchmarks.snake_names`.
+"""
+import json
+import time
+from collections.abc import Callable, Iterable
+
+from rapidfuzz import fuzz
+
+from bot.exts.fun.snakes._converter import SnakeNameIndex
+from bot.exts.fun.snakes._utils import SNAKE_RESOURCES
+
+ROUNDS = 5
+QUERIES = {
+    "exact": ("king cobra", "black mamba", "Black-necked spitting cobra", "green anaconda", "boomslang"),
+    "prefix": ("king", "mamb", "rattle", "anacon", "viper"),
+    "typo": ("kign cobra", "blak mamba", "rattlesnaek", "anacondda", "boomslnag"),
+}
+
+
+def load_snakes() -> list[dict[str, str]]:
+    """Load the snakes the converter resolves names of."""
+    return json.loads((SNAKE_RESOURCES / "snake_names.json").read_text("utf8"))
+
+
+def legacy_find(snakes: Iterable[dict[str, str]], query: str, threshold: int = 80) -> list[str]:
+    """Find the names `query` could refer to, rebuilding the names and scoring each, as `Snake.convert` used to."""
+    names = {snake["name"]: snake["scientific"] for snake in snakes}
+    all_names = names.keys() | names.values()
+    query = query.lower()
+
+    potential = []
+    for name in all_names:
+        if name.lower() == query:
+            return [name]
+        if fuzz.ratio(query, name.lower()) >= threshold or fuzz.partial_ratio(query, name.lower()) >= threshold:
+            potential.append(name)
+    return potential
+
+
+def time_queries(find: Callable[[str], list[str]], queries: Iterable[str]) -> float:
+    """Return the best time of `ROUNDS` runs of `find` over `queries`, in seconds per query."""
+    queries = list(queries)
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for query in queries:
+            find(query)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(queries)
+
+
+def main() -> None:
+    """Check both implementations agree on the prefixes and misspelt queries, then print their timings."""
+    snakes = load_snakes()
+    start = time.perf_counter()
+    index = SnakeNameIndex(snakes)
+    print(f"Indexed {len(index.names)} names in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for query in (*QUERIES["prefix"], *QUERIES["typo"]):
+        if set(index.find(query)) != set(legacy_find(snakes, query)):
+            raise SystemExit(f"The names found for {query!r} don't match.")
+
+    for kind, queries in QUERIES.items():
+        legacy = time_queries(lambda query: legacy_find(snakes, query), queries)
+        indexed = time_queries(index.find, queries)
+        print(
+            f"{kind:>6} | legacy: {legacy * 1000:6.2f}ms | indexed: {indexed * 1000:6.3f}ms"
+            f" | speedup: {legacy / indexed:.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
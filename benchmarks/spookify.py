@@ -0,0 +1,94 @@
+"""
+Time the spook effects with cached overlays against loading and resizing the overlays on every call.
+
+Each effect runs on a 1024x1024 avatar, the size the avatar commands resize to, with the same random state for
+both implementations, which must produce the same image. Applying every effect in one pass is timed too.
+
+Run from the repository root with `python -m benchmarks.spookify`.
+"""
+import random
+import time
+from collections.abc import Callable
+
+from PIL import Image, ImageOps
+
+from benchmarks.mosaic import sample_avatar
+from bot.utils.halloween import spookifications
+
+ROUNDS = 20
+
+
+def legacy_pentagram(im: Image.Image) -> Image.Image:
+    """Add the pentagram, opening and resizing it from disk, as `spookifications.pentagram` used to."""
+    im = im.convert("RGB")
+    wt, ht = im.size
+    penta = Image.open("bot/resources/holidays/halloween/bloody-pentagram.png")
+    penta = penta.resize((wt, ht))
+    im.paste(penta, (0, 0), penta)
+    return im
+
+
+def legacy_bat(im: Image.Image) -> Image.Image:
+    """Add the bats, opening and resizing them from disk, as `spookifications.bat` used to."""
+    im = im.convert("RGB")
+    wt, _ = im.size
+    bat = Image.open("bot/resources/holidays/halloween/bat-clipart.png")
+    bat_size = random.randint(wt//10, wt//7)
+    rot = random.randint(0, 90)
+    bat = bat.resize((bat_size, bat_size))
+    bat = bat.rotate(rot)
+    x = random.randint(wt-(bat_size * 3), wt-bat_size)
+    y = random.randint(10, bat_size)
+    im.paste(bat, (x, y), bat)
+    im.paste(bat, (x + bat_size, y + (bat_size // 4)), bat)
+    im.paste(bat, (x - bat_size, y - (bat_size // 2)), bat)
+    return im
+
+
+def legacy_all(im: Image.Image) -> Image.Image:
+    """Apply every effect one after the other, each converting the image and loading its overlay."""
+    return legacy_bat(legacy_pentagram(ImageOps.invert(im.convert("RGB"))))
+
+
+def all_effects(im: Image.Image) -> Image.Image:
+    """Apply every effect in one pass."""
+    return spookifications.spookify(im, "inversion", "pentagram", "bat")
+
+
+COMPARISONS = (
+    ("pentagram", legacy_pentagram, spookifications.pentagram),
+    ("bat", legacy_bat, spookifications.bat),
+    ("all", legacy_all, all_effects),
+)
+
+
+def time_effect(effect: Callable[[Image.Image], Image.Image], image: Image.Image) -> float:
+    """Return the best time of `ROUNDS` runs of `effect`, in seconds."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        effect(image)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """Check both implementations agree for each effect, then print their timings."""
+    avatar = sample_avatar()
+    for name, legacy_effect, effect in COMPARISONS:
+        random.seed(name)
+        legacy_result = legacy_effect(avatar)
+        random.seed(name)
+        if effect(avatar).tobytes() != legacy_result.tobytes():
+            raise SystemExit(f"The {name} effects don't match.")
+
+        legacy = time_effect(legacy_effect, avatar)
+        cached = time_effect(effect, avatar)
+        print(
+            f"{name:>9} | uncached: {legacy * 1000:6.1f}ms | cached: {cached * 1000:6.1f}ms"
+            f" | speedup: {legacy / cached:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
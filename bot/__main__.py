@@ -86,4 +86,6 @@ async def main() -> None:
                 await _bot.start(constants.Client.token.get_secret_value())
 
 
-asyncio.run(main())
+# Render workers import this module when they're spawned, which mustn't start another bot.
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,6 +6,7 @@ from pydis_core.utils import scheduling
 from pydis_core.utils.logging import get_logger
 
 from bot import constants, exts
+from bot.utils.render import RenderService
 
 log = get_logger(__name__)
 
@@ -23,6 +24,10 @@ class Bot(BotBase):
 
     name = constants.Client.name
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.render = RenderService()
+
     @property
     def member(self) -> discord.Member | None:
         """Retrieves the guild member object for the bot."""
@@ -50,6 +55,11 @@ class Bot(BotBase):
 
         await devlog.send(embed=embed)
 
+    async def close(self) -> None:
+        """Close the bot, then shut down the render service once no cog can submit new jobs."""
+        await super().close()
+        await self.render.shutdown()
+
     async def setup_hook(self) -> None:
         """Default async initialisation method for discord.py."""
         await super().setup_hook()
@@ -0,0 +1,150 @@
+"""
+Applying avatar effects to every frame of animated avatars.
+
+Frames are rendered in chunks, and the chunks are split into one contiguous span per render service worker.
+Seeking a GIF decodes every frame up to the one sought, so each worker decodes its span in a single pass
+forward rather than starting over for every chunk. Each chunk is encoded as a small GIF whose frames share
+one palette, and the chunks are then spliced into a single GIF at the byte level with
+`bot.utils.gif.splice_gifs`, so an avatar's frames are never all held at once.
+"""
+import asyncio
+import math
+from collections.abc import Callable
+from io import BytesIO
+
+from PIL import Image, ImageSequence
+
+from bot.utils.gif import splice_gifs
+from bot.utils.render import RenderService
+
+# Frames past this many are dropped evenly, their durations added to the frames that are kept
+MAX_FRAMES = 120
+FRAMES_PER_CHUNK = 8
+# Sizes animations are rendered at, from the largest; the largest expected to fit in the byte budget is used
+ANIMATED_SIZES = (512, 256, 128)
+MAX_ANIMATED_BYTES = 8 * 1024 * 1024
+# Effects are written for images of this size, so frames are scaled to it before the effect is applied
+EFFECT_SIZE = 1024
+DEFAULT_DURATION = 100
+# Palettes have at most 255 colours, so the last index is free to mark transparent pixels
+TRANSPARENT_INDEX = 255
+
+
+def frame_durations(image_bytes: bytes) -> list[int]:
+    """Returns the duration of each frame of an animated image, in milliseconds."""
+    with Image.open(BytesIO(image_bytes)) as image:
+        return [frame.info.get("duration") or DEFAULT_DURATION for frame in ImageSequence.Iterator(image)]
+
+
+def sample_frames(durations: list[int], max_frames: int = MAX_FRAMES) -> tuple[list[int], list[int]]:
+    """Picks at most `max_frames` evenly spaced frames, returning their indices and their new durations."""
+    step = math.ceil(len(durations) / max_frames)
+    indices = list(range(0, len(durations), step))
+    return indices, [sum(durations[index:index + step]) for index in indices]
+
+
+def _palette(frames: list[Image.Image]) -> Image.Image:
+    """Returns a palette image holding up to 255 colours fitting every one of `frames`."""
+    # Quantizing a strip of thumbnails gives a palette covering all the frames, for little more than one's cost.
+    thumbnail_size = max(frames[0].width // len(frames), 1)
+    strip = Image.new("RGB", (thumbnail_size * len(frames), thumbnail_size))
+    for position, frame in enumerate(frames):
+        strip.paste(frame.convert("RGB").resize((thumbnail_size, thumbnail_size)), (position * thumbnail_size, 0))
+
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(strip.quantize(TRANSPARENT_INDEX).getpalette()[:TRANSPARENT_INDEX * 3])
+    return palette
+
+
+def _to_palette(frame: Image.Image, palette: Image.Image) -> Image.Image:
+    """Maps `frame` onto `palette`, marking mostly transparent pixels with `TRANSPARENT_INDEX`."""
+    indexed = frame.convert("RGB").quantize(palette=palette)
+    indexed.paste(TRANSPARENT_INDEX, mask=frame.getchannel("A").point(lambda alpha: 255 if alpha < 128 else 0))
+    return indexed
+
+
+def _render_chunk(
+    image: Image.Image,
+    effect: Callable,
+    indices: list[int],
+    durations: list[int],
+    size: int,
+    *args,
+) -> bytes:
+    """
+    Applies `effect` to the frames at `indices` of an open animated image, returning them as a GIF.
+
+    Frames are decoded one at a time, and only the chunk's frames are held after their effect is applied. They
+    all share one palette, which saves quantizing every frame from scratch and lets the GIF store a single
+    colour table.
+    """
+    frames = []
+    for index in indices:
+        image.seek(index)
+        frame = effect(image.convert("RGBA").resize((EFFECT_SIZE, EFFECT_SIZE)), *args)
+        frames.append(frame.convert("RGBA").resize((size, size)))
+
+    palette = _palette(frames)
+    frames = [_to_palette(frame, palette) for frame in frames]
+    buffer = BytesIO()
+    frames[0].save(
+        buffer,
+        "GIF",
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        disposal=2,
+        transparency=TRANSPARENT_INDEX,
+    )
+    return buffer.getvalue()
+
+
+def render_chunks(
+    image_bytes: bytes,
+    effect: Callable,
+    chunks: list[tuple[list[int], list[int]]],
+    size: int,
+    *args,
+) -> list[bytes]:
+    """
+    Applies `effect` to each chunk of `(indices, durations)` of an animated image, returning each as a GIF.
+
+    Chunks must be in order, so the image is decoded in one pass, from its first frame to the last one needed.
+    """
+    with Image.open(BytesIO(image_bytes)) as image:
+        return [_render_chunk(image, effect, indices, durations, size, *args) for indices, durations in chunks]
+
+
+async def render_animated(render: RenderService, image_bytes: bytes, effect: Callable, *args) -> bytes | None:
+    """
+    Applies `effect` to every frame of an animated image in the render service, returning a GIF.
+
+    Chunks of frames are rendered in parallel, in one contiguous span of chunks per worker. The size of the
+    whole animation is estimated from its first chunk, so that the largest of `ANIMATED_SIZES` expected to fit
+    in `MAX_ANIMATED_BYTES` is used. None is returned if the animation doesn't fit at any size.
+    """
+    indices, durations = sample_frames(await render.run(frame_durations, image_bytes))
+    chunks = [
+        (indices[start:start + FRAMES_PER_CHUNK], durations[start:start + FRAMES_PER_CHUNK])
+        for start in range(0, len(indices), FRAMES_PER_CHUNK)
+    ]
+
+    largest = ANIMATED_SIZES[0]
+    [first] = await render.run(render_chunks, image_bytes, effect, chunks[:1], largest, *args)
+    estimate = len(first) * len(indices) / len(chunks[0][0])
+    size = next(
+        (size for size in ANIMATED_SIZES if estimate * (size / largest) ** 2 <= MAX_ANIMATED_BYTES),
+        ANIMATED_SIZES[-1],
+    )
+
+    rendered = [first] if size == largest else []
+    remaining = chunks[len(rendered):]
+    span = math.ceil(len(remaining) / render.max_workers)
+    for span_chunks in await asyncio.gather(*(
+        render.run(render_chunks, image_bytes, effect, remaining[start:start + span], size, *args)
+        for start in range(0, len(remaining), span)
+    )):
+        rendered += span_chunks
+
+    gif = await render.run(splice_gifs, rendered)
+    return gif if len(gif) <= MAX_ANIMATED_BYTES else None
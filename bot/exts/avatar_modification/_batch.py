@@ -0,0 +1,164 @@
+"""
+Applying an avatar effect to many members' avatars at once, for server events.
+
+Avatars are read a few at a time into a bounded queue, so downloads never run far ahead of rendering.
+They're rendered in the render service's background lane, which leaves a worker free for avatar commands,
+and the results are handed to an uploader one at a time, which sends them in as few messages as it can.
+"""
+import asyncio
+import time
+import zipfile
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from io import BytesIO
+
+import discord
+from pydis_core.utils.logging import get_logger
+
+from bot.exts.avatar_modification._effects import PfpEffects
+from bot.utils.render import RenderService
+
+log = get_logger(__name__)
+
+# Avatars downloaded at once, and downloaded or rendered avatars waiting for the next step
+CONCURRENT_DOWNLOADS = 4
+QUEUE_SIZE = 16
+# Discord's limit on attachments per message; results past it are sent as zip archives instead
+MESSAGE_FILES = 10
+# Room left in each zip archive for the headers of each file
+ZIP_ENTRY_OVERHEAD = 256
+
+
+@dataclass
+class BatchReport:
+    """Counts of avatars rendered and failed in a batch, with the bytes uploaded and time taken."""
+
+    rendered: int = 0
+    failed: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Avatars rendered per second."""
+        return self.rendered / self.seconds if self.seconds else 0.0
+
+
+async def render_batch(
+    render: RenderService,
+    avatars: Iterable[tuple[str, discord.Asset]],
+    effect: Callable,
+    *args,
+    read: Callable[[discord.Asset], Awaitable[bytes]],
+    upload: Callable[[str, bytes], Awaitable[None]],
+) -> BatchReport:
+    """
+    Applies `effect` to each of the named `avatars`, passing every result to `upload` as it's rendered.
+
+    Avatars are downloaded with `read`, so a cache in front of it saves downloading them again. Avatars that
+    can't be downloaded, rendered or uploaded are skipped and counted as failures, without stopping the rest of
+    the batch. Animated avatars are rendered from their first frame.
+    """
+    report = BatchReport()
+    start = time.perf_counter()
+    avatars = iter(avatars)
+    downloaded = asyncio.Queue(QUEUE_SIZE)
+    rendered = asyncio.Queue(QUEUE_SIZE)
+
+    async def download() -> None:
+        for name, avatar in avatars:
+            try:
+                image_bytes = await read(avatar)
+            except discord.HTTPException as e:
+                log.info(f"Couldn't download the avatar of {name} for a batch: {e}")
+                report.failed += 1
+                continue
+            except Exception:
+                log.exception(f"Couldn't download the avatar of {name} for a batch.")
+                report.failed += 1
+                continue
+            await downloaded.put((name, image_bytes))
+
+    async def render_avatars() -> None:
+        while (item := await downloaded.get()) is not None:
+            name, image_bytes = item
+            try:
+                encoded = await render.run(PfpEffects.apply_effect, image_bytes, effect, *args, background=True)
+            except Exception:
+                log.exception(f"Couldn't render the avatar of {name} for a batch.")
+                report.failed += 1
+                continue
+            await rendered.put((name, encoded.data))
+
+    async def collect() -> None:
+        while (item := await rendered.get()) is not None:
+            name, image = item
+            try:
+                await upload(name, image)
+            except discord.HTTPException as e:
+                log.info(f"Couldn't upload the avatar of {name} for a batch: {e}")
+                report.failed += 1
+                continue
+            report.rendered += 1
+            report.bytes += len(image)
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(collect())
+        renderers = [group.create_task(render_avatars()) for _ in range(render.max_workers)]
+        await asyncio.gather(*(download() for _ in range(CONCURRENT_DOWNLOADS)))
+        for _ in renderers:
+            await downloaded.put(None)
+        await asyncio.gather(*renderers)
+        await rendered.put(None)
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+class BatchUploader:
+    """
+    Sends rendered avatars to a channel in as few messages as possible.
+
+    If a batch has at most `MESSAGE_FILES` results, they're sent together as plain files. Otherwise they're
+    sent in zip archives, each sent as soon as the next result would take it over `max_bytes`, so results are
+    never all held at once. Archives store the images as they are, since they're already compressed.
+    """
+
+    def __init__(self, channel: discord.abc.Messageable, archive_name: str, max_bytes: int):
+        self.channel = channel
+        self.archive_name = archive_name
+        self.max_bytes = max_bytes
+
+        self._files: list[tuple[str, bytes]] = []
+        self._size = 0
+        self.messages = 0
+
+    async def add(self, name: str, image: bytes) -> None:
+        """Add a rendered avatar, sending the pending ones first if it wouldn't fit in their archive."""
+        entry_size = len(image) + ZIP_ENTRY_OVERHEAD
+        if self._files and self._size + entry_size > self.max_bytes:
+            await self._send_archive()
+        self._files.append((name, image))
+        self._size += entry_size
+
+    async def finish(self) -> None:
+        """Send the avatars that haven't been sent yet."""
+        if not self._files:
+            return
+        if self.messages == 0 and len(self._files) <= MESSAGE_FILES:
+            await self.channel.send(files=[discord.File(BytesIO(image), name) for name, image in self._files])
+            self.messages += 1
+        else:
+            await self._send_archive()
+
+    async def _send_archive(self) -> None:
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zip_file:
+            for name, image in self._files:
+                zip_file.writestr(name, image)
+        archive.seek(0)
+
+        self.messages += 1
+        await self.channel.send(file=discord.File(archive, f"{self.archive_name}_{self.messages}.zip"))
+        self._files.clear()
+        self._size = 0
@@ -1,35 +1,38 @@
+import functools
 import math
-import random
 from collections.abc import Callable
 from io import BytesIO
 from pathlib import Path
 
-import discord
+import numpy as np
 from PIL import Image, ImageDraw, ImageOps
 
 from bot.constants import Colours
+from bot.utils.encoding import EncodedImage, encode_image
+
+PRIDE_FLAGS_DIRECTORY = Path("bot/resources/holidays/pride/flags")
+# Each ring is a 4 MiB RGBA image, cached in every render worker
+PRIDE_RING_CACHE_SIZE = 8
+# Up to this many tiles, cropping and pasting each one is faster than shuffling them as arrays, which copies the
+# whole image a few times
+MOSAIC_PASTE_MAX_SQUARES = 256
 
 
 class PfpEffects:
     """
     Implements various image modifying effects, for the PfpModify cog.
 
-    All of these functions are slow, and blocking, so they should be ran in executors.
+    All of these functions are slow, and blocking, so they should be ran in the bot's render service.
     """
 
     @staticmethod
-    def apply_effect(image_bytes: bytes, effect: Callable, filename: str, *args) -> discord.File:
-        """Applies the given effect to the image passed to it."""
+    def apply_effect(image_bytes: bytes, effect: Callable, *args) -> EncodedImage:
+        """Applies the given effect to the image passed to it, returning the result encoded to suit it."""
         im = Image.open(BytesIO(image_bytes))
         im = im.convert("RGBA")
         im = im.resize((1024, 1024))
         im = effect(im, *args)
-
-        bufferedio = BytesIO()
-        im.save(bufferedio, format="PNG")
-        bufferedio.seek(0)
-
-        return discord.File(bufferedio, filename=filename)
+        return encode_image(im)
 
     @staticmethod
     def closest(x: tuple[int, int, int]) -> tuple[int, int, int]:
@@ -53,35 +56,68 @@ class PfpEffects:
 
         return r, g, b
 
+    @staticmethod
+    @functools.cache
+    def easter_lookup_table() -> np.ndarray:
+        """
+        Returns the result of `closest` for every colour posterized to 6 bits per channel.
+
+        The table has 64³ rows, one per posterized colour, indexed by its channels' top 6 bits as `rrrrrrggggggbbbbbb`.
+        """
+        levels = np.arange(64, dtype=np.int32) << 2
+        palette = np.array(Colours.easter_like_colours, dtype=np.int32)
+
+        # The squared distance is a sum over channels, so it's built from one small table per channel
+        # rather than from a difference of every colour with every palette colour.
+        red, green, blue = ((levels[:, np.newaxis] - palette[:, channel]) ** 2 for channel in range(3))
+        distances = red[:, None, None] + green[None, :, None] + blue[None, None, :]
+        # Ties go to the earliest palette colour, as they do with the stable sort in `closest`.
+        nearest = palette[distances.argmin(axis=-1).reshape(-1)]
+
+        colours = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3)
+        return ((colours + nearest) // 2).astype(np.uint8)
+
+    @staticmethod
+    @functools.cache
+    def circle_mask(size: tuple[int, int]) -> Image.Image:
+        """Returns a mask of the largest circle fitting in `size`; treat it as read-only."""
+        mask = Image.new("L", size, 0)
+        draw = ImageDraw.Draw(mask)
+        draw.ellipse((0, 0) + size, fill=255)
+        return mask
+
     @staticmethod
     def crop_avatar_circle(avatar: Image.Image) -> Image.Image:
         """Crop the avatar given into a circle."""
-        mask = Image.new("L", avatar.size, 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0) + avatar.size, fill=255)
-        avatar.putalpha(mask)
+        avatar.putalpha(PfpEffects.circle_mask(avatar.size))
         return avatar
 
     @staticmethod
     def crop_ring(ring: Image.Image, px: int) -> Image.Image:
         """Crop the given ring into a circle."""
-        mask = Image.new("L", ring.size, 0)
+        mask = PfpEffects.circle_mask(ring.size).copy()
         draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0) + ring.size, fill=255)
         draw.ellipse((px, px, 1024-px, 1024-px), fill=0)
         ring.putalpha(mask)
         return ring
 
+    @staticmethod
+    @functools.cache
+    def pride_flag(flag: str) -> Image.Image:
+        """Returns the given pride flag, resized to cover an avatar; treat it as read-only."""
+        return Image.open(PRIDE_FLAGS_DIRECTORY / f"{flag}.png").resize((1024, 1024))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=PRIDE_RING_CACHE_SIZE)
+    def pride_ring(flag: str, pixels: int) -> Image.Image:
+        """Returns the ring of the given pride flag that is `pixels` thick, as RGBA; treat it as read-only."""
+        return PfpEffects.crop_ring(PfpEffects.pride_flag(flag).convert("RGBA"), pixels)
+
     @staticmethod
     def pridify_effect(image: Image.Image, pixels: int, flag: str) -> Image.Image:
         """Applies the given pride effect to the given image."""
         image = PfpEffects.crop_avatar_circle(image)
-
-        ring = Image.open(Path(f"bot/resources/holidays/pride/flags/{flag}.png")).resize((1024, 1024))
-        ring = ring.convert("RGBA")
-        ring = PfpEffects.crop_ring(ring, pixels)
-
-        image.alpha_composite(ring, (0, 0))
+        image.alpha_composite(PfpEffects.pride_ring(flag, pixels))
         return image
 
     @staticmethod
@@ -127,161 +163,20 @@ class PfpEffects:
         else:
             overlay_image = Image.open(Path("bot/resources/holidays/easter/chocolate_bunny.png"))
 
-        alpha = image.getchannel("A").getdata()
-        image = image.convert("RGB")
-        image = ImageOps.posterize(image, 6)
-
-        data = image.getdata()
-        data_set = set(data)
-        easterified_data_set = {}
-
-        for x in data_set:
-            easterified_data_set[x] = PfpEffects.closest(x)
-        new_pixel_data = [
-            (*easterified_data_set[x], alpha[i])
-            if x in easterified_data_set else x
-            for i, x in enumerate(data)
+        pixels = np.asarray(image.convert("RGBA"))
+        rgb = pixels[..., :3] >> 2
+        # Index the lookup table by the colour's 6 bit posterized channels.
+        easterified = PfpEffects.easter_lookup_table()[
+            rgb[..., 0].astype(np.intp) << 12 | rgb[..., 1].astype(np.intp) << 6 | rgb[..., 2]
         ]
 
-        im = Image.new("RGBA", image.size)
-        im.putdata(new_pixel_data)
+        im = Image.fromarray(np.dstack((easterified, pixels[..., 3])), "RGBA")
         im.alpha_composite(
             overlay_image,
             (im.width - overlay_image.width, (im.height - overlay_image.height) // 2)
         )
         return im
 
-    @staticmethod
-    def split_image(img: Image.Image, squares: int) -> list:
-        """
-        Split an image into a selection of squares, specified by the squares argument.
-
-        Explanation:
-
-        1. It gets the width and the height of the Image passed to the function.
-
-        2. It gets the root of a number of squares (number of squares) passed, which is called xy. Reason: if let's say
-        25 squares (number of squares) were passed, that is the total squares (split pieces) that the image is supposed
-        to be split into. As it is known, a 2D shape has a height and a width, and in this case the program thinks of it
-        as rows and columns. Rows multiplied by columns is equal to the passed squares (number of squares). To get rows
-        and columns, since in this case, each square (split piece) is identical, rows are equal to columns and the
-        program treats the image as a square-shaped, it gets the root out of the squares (number of squares) passed.
-
-        3. Now width and height are both of the original Image, Discord PFP, so when it comes to forming the squares,
-        the program divides the original image's height and width by the xy. In a case of 25 squares (number of squares)
-        passed, xy would be 5, so if an image was 250x300, x_frac would be 50 and y_frac - 60. Note:
-        x_frac stands for a fracture of width. The reason it's called that is because it is shorter to use x for width
-        in mind and then it's just half of the word fracture, same applies to y_frac, just height instead of width.
-        x_frac and y_frac are width and height of a single square (split piece).
-
-        4. With left, top, right, bottom, = 0, 0, x_frac, y_frac, the program sets these variables to create the initial
-        square (split piece). Explanation: all of these 4 variables start at the top left corner of the Image, by adding
-        value to right and bottom, it's creating the initial square (split piece).
-
-        5. In the for loop, it keeps adding those squares (split pieces) in a row and once (index + 1) % xy == 0 is
-        True, it adds to top and bottom to lower them and reset right and left to recreate the initial space between
-        them, forming a square (split piece), it also adds the newly created square (split piece) into the new_imgs list
-        where it stores them. The program keeps repeating this process till all 25 squares get added to the list.
-
-        6. It returns new_imgs, a list of squares (split pieces).
-        """
-        width, heigth = img.size
-
-        xy = math.sqrt(squares)
-
-        x_frac = width // xy
-        y_frac = heigth // xy
-
-        left, top, right, bottom, = 0, 0, x_frac, y_frac
-
-        new_imgs = []
-
-        for index in range(squares):
-            new_img = img.crop((left, top, right, bottom))
-            new_imgs.append(new_img)
-
-            if (index + 1) % xy == 0:
-                top += y_frac
-                bottom += y_frac
-                left = 0
-                right = x_frac
-            else:
-                left += x_frac
-                right += x_frac
-
-        return new_imgs
-
-    @staticmethod
-    def join_images(images: list[Image.Image]) -> Image.Image:
-        """
-        Stitches all the image squares into a new image.
-
-        Explanation:
-
-        1. Shuffles the passed images to randomize the pieces.
-
-        2. The program gets a single square (split piece) out of the list and defines single_width as the square's width
-        and single_height as the square's height.
-
-        3. It gets the root of type integer of the number of images (split pieces) in the list and calls it multiplier.
-        Program then proceeds to calculate total height and width of the new image that it's creating using the same
-        multiplier.
-
-        4. The program then defines new_image as the image that it's creating, using the previously obtained total_width
-        and total_height.
-
-        5. Now it defines width_multiplier as well as height with values of 0. These will be used to correctly position
-        squares (split pieces) onto the new_image canvas.
-
-        6. Similar to how in the split_image function, the program gets the root of number of images in the list.
-        In split_image function, it was the passed squares (number of squares) instead of a number of imgs in the
-        list that it got the square of here.
-
-        7. In the for loop, as it iterates, the program multiplies single_width by width_multiplier to correctly
-        position a square (split piece) width wise. It then proceeds to paste the newly positioned square (split piece)
-        onto the new_image. The program increases the width_multiplier by 1 every iteration so the image wouldn't get
-        pasted in the same spot and the positioning would move accordingly. It makes sure to increase the
-        width_multiplier before the check, which checks if the end of a row has been reached, -
-        (index + 1) % pieces == 0, so after it, if it was True, width_multiplier would have been reset to 0 (start of
-        the row). If the check returns True, the height gets increased by a single square's (split piece) height to
-        lower the positioning height wise and, as mentioned, the width_multiplier gets reset to 0 and width will
-        then be calculated from the start of the new row. The for loop finishes once all the squares (split pieces) were
-        positioned accordingly.
-
-        8. Finally, it returns the new_image, the randomized squares (split pieces) stitched back into the format of the
-        original image - user's PFP.
-        """
-        random.shuffle(images)
-        single_img = images[0]
-
-        single_wdith = single_img.size[0]
-        single_height = single_img.size[1]
-
-        multiplier = int(math.sqrt(len(images)))
-
-        total_width = multiplier * single_wdith
-        total_height = multiplier * single_height
-
-        new_image = Image.new("RGBA", (total_width, total_height), (250, 250, 250))
-
-        width_multiplier = 0
-        height = 0
-
-        squares = math.sqrt(len(images))
-
-        for index, image in enumerate(images):
-            width = single_wdith * width_multiplier
-
-            new_image.paste(image, (width, height))
-
-            width_multiplier += 1
-
-            if (index + 1) % squares == 0:
-                width_multiplier = 0
-                height += single_height
-
-        return new_image
-
     @staticmethod
     def mosaic_effect(image: Image.Image, squares: int) -> Image.Image:
         """
@@ -289,8 +184,42 @@ class PfpEffects:
 
         The "squares" argument specifies the number of squares to split
         the image into. This should be a square number.
-        """
-        img_squares = PfpEffects.split_image(image, squares)
-        new_img = PfpEffects.join_images(img_squares)
 
-        return new_img
+        Up to `MOSAIC_PASTE_MAX_SQUARES` tiles are cropped and pasted one by one. Past that, the image's pixels
+        are viewed as a grid of tiles, which are shuffled with a single fancy index. Either way, pixels past the
+        last whole row or column of tiles are dropped.
+        """
+        per_side = math.isqrt(squares)
+        squares = per_side * per_side
+        tile_width, tile_height = image.width // per_side, image.height // per_side
+        order = np.random.default_rng().permutation(squares)
+
+        if squares <= MOSAIC_PASTE_MAX_SQUARES:
+            mosaic = Image.new(image.mode, (per_side * tile_width, per_side * tile_height))
+            for position, tile in enumerate(order.tolist()):
+                row, column = divmod(tile, per_side)
+                mosaic.paste(
+                    image.crop((
+                        column * tile_width, row * tile_height, (column + 1) * tile_width, (row + 1) * tile_height
+                    )),
+                    (position % per_side * tile_width, position // per_side * tile_height),
+                )
+            return mosaic
+
+        pixels = np.asarray(image)
+        channels = pixels.shape[2]
+
+        # A (row, column, y, x, channel) view of the tiles, without copying any pixels
+        tiles = (
+            pixels[:per_side * tile_height, :per_side * tile_width]
+            .reshape(per_side, tile_height, per_side, tile_width, channels)
+            .swapaxes(1, 2)
+        )
+        shuffled = tiles[order // per_side, order % per_side]
+        mosaic = (
+            shuffled
+            .reshape(per_side, per_side, tile_height, tile_width, channels)
+            .swapaxes(1, 2)
+            .reshape(per_side * tile_height, per_side * tile_width, channels)
+        )
+        return Image.fromarray(mosaic, image.mode)
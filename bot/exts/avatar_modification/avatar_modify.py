@@ -1,47 +1,52 @@
-import asyncio
 import json
 import math
+import shutil
 import string
+import tempfile
 import unicodedata
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable, Hashable
+from functools import partial
+from io import BytesIO
 from pathlib import Path
-from typing import TypeVar
 
 import discord
 from discord.ext import commands
 from pydis_core.utils.logging import get_logger
 
 from bot.bot import Bot
-from bot.constants import Colours, Emojis
+from bot.constants import Colours, Emojis, Roles
+from bot.exts.avatar_modification._animation import render_animated
+from bot.exts.avatar_modification._batch import BatchUploader, render_batch
 from bot.exts.avatar_modification._effects import PfpEffects
+from bot.utils.cache import ByteCache, SingleFlight
+from bot.utils.encoding import file_extension
 from bot.utils.halloween import spookifications
 
 log = get_logger(__name__)
 
-_EXECUTOR = ThreadPoolExecutor(10)
-
 FILENAME_STRING = "{effect}_{author}.png"
 
 MAX_SQUARES = 10_000
 
-T = TypeVar("T")
+# Bounds of the cache of downloaded avatars and rendered effects, in memory and spilled to disk
+CACHE_BYTES = 64 * 1024 * 1024
+CACHE_SPILL_BYTES = 256 * 1024 * 1024
+# How long fetched users are reused for; short, since users are fetched to get their current avatar
+USER_TTL = 30
+
+# Effects that can be applied in batches, with their arguments; pride flag options can be given too
+BATCH_EFFECTS = {
+    "8bitify": (PfpEffects.eight_bitify_effect, ()),
+    "reverse": (PfpEffects.flip_effect, ()),
+    "spooky": (spookifications.get_random_effect, ()),
+}
+BATCH_MAX_MEMBERS = 1_000
+BATCH_AVATAR_SIZE = 1024
+BATCH_PRIDE_PIXELS = 64
 
 GENDER_OPTIONS = json.loads(Path("bot/resources/holidays/pride/gender_options.json").read_text("utf8"))
 
 
-async def in_executor(func: Callable[..., T], *args) -> T:
-    """
-    Runs the given synchronous function `func` in an executor.
-
-    This is useful for running slow, blocking code within async
-    functions, so that they don't block the bot.
-    """
-    log.trace(f"Running {func.__name__} in an executor.")
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(_EXECUTOR, func, *args)
-
-
 def file_safe_name(effect: str, display_name: str) -> str:
     """Returns a file safe filename based on the given effect and display name."""
     valid_filename_chars = f"-_. {string.ascii_letters}{string.digits}"
@@ -64,6 +69,19 @@ class AvatarModify(commands.Cog):
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        self.cache = ByteCache(
+            CACHE_BYTES,
+            spill_dir=Path(tempfile.mkdtemp(prefix="avatar_cache_")),
+            max_spill_bytes=CACHE_SPILL_BYTES,
+        )
+        # Commands run at the same time share user fetches and avatar downloads rather than repeating them
+        self.user_fetches = SingleFlight(USER_TTL)
+        self.avatar_downloads = SingleFlight()
+
+    async def cog_unload(self) -> None:
+        """Delete the cache's spilled entries."""
+        await self.cache.clear()
+        shutil.rmtree(self.cache.spill_dir, ignore_errors=True)
 
     async def _fetch_user(self, user_id: int) -> discord.User | None:
         """
@@ -72,10 +90,11 @@ class AvatarModify(commands.Cog):
         This helper function is required as the member cache doesn't always have the most up to date
         profile picture. This can lead to errors if the image is deleted from the Discord CDN.
         fetch_member can't be used due to the avatar url being part of the user object, and
-        some weird caching that D.py does
+        some weird caching that D.py does. Users fetched in the last `USER_TTL` seconds are reused, and
+        concurrent fetches of the same user share one request.
         """
         try:
-            user = await self.bot.fetch_user(user_id)
+            user = await self.user_fetches.run(user_id, partial(self.bot.fetch_user, user_id))
         except discord.errors.NotFound:
             log.debug(f"User {user_id} could not be found.")
             return None
@@ -85,6 +104,55 @@ class AvatarModify(commands.Cog):
 
         return user
 
+    async def _read_avatar(self, avatar: discord.Asset, size: int) -> bytes:
+        """Download `avatar` at `size` pixels, unless it's cached; avatars are keyed by their hash, so never stale."""
+        key = ("avatar", avatar.key, size)
+        if (image_bytes := await self.cache.get(key)) is None:
+            image_bytes = await self.avatar_downloads.run(key, partial(self._download_avatar, avatar, size, key))
+        return image_bytes
+
+    async def _download_avatar(self, avatar: discord.Asset, size: int, key: Hashable) -> bytes:
+        """Download `avatar` at `size` pixels from the CDN, caching it under `key`."""
+        image_bytes = await avatar.replace(size=size).read()
+        await self.cache.put(key, image_bytes)
+        return image_bytes
+
+    async def _render_avatar(
+        self,
+        avatar: discord.Asset,
+        effect: Callable,
+        file_name: str,
+        *args,
+        size: int = 1024,
+        cache_key: Hashable | None = None,
+        animated: bool = False,
+    ) -> discord.File:
+        """
+        Applies `effect` to `avatar` in the bot's render service.
+
+        Rendering runs in a worker process, so that it doesn't block the bot. If a `cache_key` identifying the
+        effect's arguments is given, the rendered image is cached, so rendering it again is free; randomised
+        effects shouldn't give one. If `animated` is set and the avatar is animated, the effect is applied to
+        every frame and the file is a GIF, unless the animation is too large, in which case only its first
+        frame is used. Otherwise, the file's format depends on the rendered image.
+        """
+        animated = animated and avatar.is_animated()
+        key = ("effect", avatar.key, size, effect.__qualname__, cache_key, animated)
+        if cache_key is None or (image := await self.cache.get(key)) is None:
+            image_bytes = await self._read_avatar(avatar, size)
+            image = None
+            if animated:
+                image = await render_animated(self.bot.render, image_bytes, effect, *args)
+            if image is None:
+                encoded = await self.bot.render.run(PfpEffects.apply_effect, image_bytes, effect, *args)
+                encoded.report(self.bot.stats, f"avatar.{effect.__name__}")
+                image = encoded.data
+            if cache_key is not None:
+                await self.cache.put(key, image)
+
+        file_name = str(Path(file_name).with_suffix(file_extension(image)))
+        return discord.File(BytesIO(image), filename=file_name)
+
     @commands.group(aliases=("avatar_mod", "pfp_mod", "avatarmod", "pfpmod"))
     async def avatar_modify(self, ctx: commands.Context) -> None:
         """Groups all of the pfp modifying commands to allow a single concurrency limit."""
@@ -100,14 +168,14 @@ class AvatarModify(commands.Cog):
                 await ctx.send(f"{Emojis.cross_mark} Could not get user info.")
                 return
 
-            image_bytes = await user.display_avatar.replace(size=1024).read()
             file_name = file_safe_name("eightbit_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
+            file = await self._render_avatar(
+                user.display_avatar,
                 PfpEffects.eight_bitify_effect,
-                file_name
+                file_name,
+                cache_key=(),
+                animated=True
             )
 
             embed = discord.Embed(
@@ -115,7 +183,7 @@ class AvatarModify(commands.Cog):
                 description="Here is your avatar. I think it looks all cool and 'retro'."
             )
 
-            embed.set_image(url=f"attachment://{file_name}")
+            embed.set_image(url=f"attachment://{file.filename}")
             embed.set_footer(text=f"Made by {ctx.author.display_name}.", icon_url=user.display_avatar.url)
 
         await ctx.send(embed=embed, file=file)
@@ -137,14 +205,14 @@ class AvatarModify(commands.Cog):
                 await ctx.send(f"{Emojis.cross_mark} Could not get user info.")
                 return
 
-            image_bytes = await user.display_avatar.replace(size=1024).read()
             filename = file_safe_name("reverse_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
+            file = await self._render_avatar(
+                user.display_avatar,
                 PfpEffects.flip_effect,
-                filename
+                filename,
+                cache_key=(),
+                animated=True
             )
 
             embed = discord.Embed(
@@ -152,7 +220,7 @@ class AvatarModify(commands.Cog):
                 description="Here is your reversed avatar. I think it is a spitting image of you."
             )
 
-            embed.set_image(url=f"attachment://{filename}")
+            embed.set_image(url=f"attachment://{file.filename}")
             embed.set_footer(text=f"Made by {ctx.author.display_name}.", icon_url=user.display_avatar.url)
 
             await ctx.send(embed=embed, file=file)
@@ -194,30 +262,32 @@ class AvatarModify(commands.Cog):
                     return
                 ctx.send = send_message  # Reassigns ctx.send
 
-            image_bytes = await user.display_avatar.replace(size=256).read()
             file_name = file_safe_name("easterified_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
+            file = await self._render_avatar(
+                user.display_avatar,
                 PfpEffects.easterify_effect,
                 file_name,
-                egg
+                egg,
+                size=256,
+                # Decorated eggs have a random design, so only the plain bunny can be cached
+                cache_key=None if colours else (),
+                animated=True
             )
 
             embed = discord.Embed(
                 title="Your Lovely Easterified Avatar!",
                 description="Here is your lovely avatar, all bright and colourful\nwith Easter pastel colours. Enjoy :D"
             )
-            embed.set_image(url=f"attachment://{file_name}")
+            embed.set_image(url=f"attachment://{file.filename}")
             embed.set_footer(text=f"Made by {ctx.author.display_name}.", icon_url=user.display_avatar.url)
 
         await ctx.send(file=file, embed=embed)
 
-    @staticmethod
     async def send_pride_image(
+        self,
         ctx: commands.Context,
-        image_bytes: bytes,
+        avatar: discord.Asset,
         pixels: int,
         flag: str,
         option: str
@@ -226,20 +296,21 @@ class AvatarModify(commands.Cog):
         async with ctx.typing():
             file_name = file_safe_name("pride_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
+            file = await self._render_avatar(
+                avatar,
                 PfpEffects.pridify_effect,
                 file_name,
                 pixels,
-                flag
+                flag,
+                cache_key=(pixels, flag),
+                animated=True
             )
 
             embed = discord.Embed(
                 title="Your Lovely Pride Avatar!",
                 description=f"Here is your lovely avatar, surrounded by\n a beautiful {option} flag. Enjoy :D"
             )
-            embed.set_image(url=f"attachment://{file_name}")
+            embed.set_image(url=f"attachment://{file.filename}")
             embed.set_footer(text=f"Made by {ctx.author.display_name}.", icon_url=ctx.author.display_avatar.url)
             await ctx.send(file=file, embed=embed)
 
@@ -269,8 +340,7 @@ class AvatarModify(commands.Cog):
             if not user:
                 await ctx.send(f"{Emojis.cross_mark} Could not get user info.")
                 return
-            image_bytes = await user.display_avatar.replace(size=1024).read()
-            await self.send_pride_image(ctx, image_bytes, pixels, flag, option)
+            await self.send_pride_image(ctx, user.display_avatar, pixels, flag, option)
 
     @prideavatar.command()
     async def flags(self, ctx: commands.Context) -> None:
@@ -297,13 +367,10 @@ class AvatarModify(commands.Cog):
             return
 
         async with ctx.typing():
-            image_bytes = await user.display_avatar.replace(size=1024).read()
-
             file_name = file_safe_name("spooky_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
+            file = await self._render_avatar(
+                user.display_avatar,
                 spookifications.get_random_effect,
                 file_name
             )
@@ -312,7 +379,7 @@ class AvatarModify(commands.Cog):
                 title="Is this you or am I just really paranoid?",
                 colour=Colours.soft_red
             )
-            embed.set_image(url=f"attachment://{file_name}")
+            embed.set_image(url=f"attachment://{file.filename}")
             embed.set_footer(text=f"Made by {ctx.author.display_name}.", icon_url=ctx.author.display_avatar.url)
 
             await ctx.send(file=file, embed=embed)
@@ -336,11 +403,8 @@ class AvatarModify(commands.Cog):
 
             file_name = file_safe_name("mosaic_avatar", ctx.author.display_name)
 
-            img_bytes = await user.display_avatar.replace(size=1024).read()
-
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                img_bytes,
+            file = await self._render_avatar(
+                user.display_avatar,
                 PfpEffects.mosaic_effect,
                 file_name,
                 squares,
@@ -362,11 +426,74 @@ class AvatarModify(commands.Cog):
                 colour=Colours.blue
             )
 
-            embed.set_image(url=f"attachment://{file_name}")
+            embed.set_image(url=f"attachment://{file.filename}")
             embed.set_footer(text=f"Made by {ctx.author.display_name}", icon_url=user.display_avatar.url)
 
             await ctx.send(file=file, embed=embed)
 
+    @avatar_modify.command(name="batch")
+    @commands.has_any_role(Roles.admins, Roles.owners)
+    @commands.max_concurrency(1)
+    async def batch_command(self, ctx: commands.Context, effect: str, *targets: discord.Role | discord.Member) -> None:
+        """
+        Applies an effect to the avatars of the given members, and of every member of the given roles.
+
+        The effect is `8bitify`, `reverse` or `spooky`, or a pride flag option for a pride avatar, e.g. `lgbt`.
+        The avatars are sent as files, or in zip archives if there are more than ten, followed by how long they
+        took. Batches render in the background, so they don't hold up anyone's avatar commands.
+        """
+        effect = effect.lower()
+        if effect in BATCH_EFFECTS:
+            effect_function, args = BATCH_EFFECTS[effect]
+        elif (flag := GENDER_OPTIONS.get(effect)) is not None:
+            effect_function, args = PfpEffects.pridify_effect, (BATCH_PRIDE_PIXELS, flag)
+        else:
+            raise commands.BadArgument(f"`{effect}` isn't an effect that can be applied in batches.")
+
+        members = {}
+        for target in targets:
+            for member in target.members if isinstance(target, discord.Role) else (target,):
+                members[member.id] = member
+        if not members:
+            raise commands.BadArgument("Give at least one member, or a role with members.")
+        if len(members) > BATCH_MAX_MEMBERS:
+            raise commands.BadArgument(f"Batches are limited to {BATCH_MAX_MEMBERS:,} members.")
+
+        await ctx.send(f"Rendering {len(members):,} avatars...")
+        uploader = BatchUploader(ctx.channel, f"{effect}_avatars", ctx.guild.filesize_limit)
+        async with ctx.typing():
+            report = await render_batch(
+                self.bot.render,
+                (
+                    # Names can be entirely lost to the cleaning, so the id keeps each file distinct
+                    (file_safe_name(f"{effect}_avatar", f"{member.name}_{member.id}"), member.display_avatar)
+                    for member in members.values()
+                ),
+                effect_function,
+                *args,
+                read=partial(self._read_avatar, size=BATCH_AVATAR_SIZE),
+                upload=lambda name, image: uploader.add(str(Path(name).with_suffix(file_extension(image))), image),
+            )
+            await uploader.finish()
+
+        self.bot.stats.incr("avatar_batch.rendered", report.rendered)
+        self.bot.stats.incr("avatar_batch.failed", report.failed)
+        self.bot.stats.timing("avatar_batch.time", report.seconds * 1000)
+
+        embed = discord.Embed(
+            title="Batch complete",
+            description=(
+                f"Rendered {report.rendered:,} avatars in {report.seconds:.1f}s ({report.rate:.1f} per second), "
+                f"{report.bytes / 1024 / 1024:.1f} MiB in {uploader.messages:,} messages."
+            ),
+            colour=Colours.soft_green if not report.failed else Colours.soft_orange,
+        )
+        if report.failed:
+            embed.add_field(
+                name="Failed", value=f"{report.failed:,} avatars couldn't be downloaded, rendered or uploaded."
+            )
+        await ctx.send(embed=embed)
+
 
 async def setup(bot: Bot) -> None:
     """Load the AvatarModify cog."""
@@ -11,7 +11,13 @@ from bot.bot import Bot
 from bot.constants import Channels, Colours, ERROR_REPLIES, NEGATIVE_REPLIES
 from bot.utils.commands import get_command_suggestions
 from bot.utils.decorators import InChannelCheckFailure, InMonthCheckFailure
-from bot.utils.exceptions import APIError, MovedCommandError, UserNotPlayingError
+from bot.utils.exceptions import (
+    APIError,
+    MovedCommandError,
+    RenderBusyError,
+    RenderTimeoutError,
+    UserNotPlayingError,
+)
 
 log = get_logger(__name__)
 
@@ -133,6 +139,15 @@ class CommandErrorHandler(commands.Cog):
             )
             return
 
+        if isinstance(error, RenderBusyError):
+            embed = self.error_embed("I'm drawing a lot of images right now, try again in a moment.", NEGATIVE_REPLIES)
+            await ctx.send(embed=embed)
+            return
+
+        if isinstance(error, RenderTimeoutError):
+            await ctx.send(embed=self.error_embed("That took too long to draw, try again later.", NEGATIVE_REPLIES))
+            return
+
         if isinstance(error, MovedCommandError):
             description = (
                 f"This command, `{ctx.prefix}{ctx.command.qualified_name}` has moved to `{error.new_command_name}`.\n"
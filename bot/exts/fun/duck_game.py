@@ -83,6 +83,13 @@ def assemble_board_image(board: list[tuple[int]], rows: int, columns: int) -> Im
     return new_im
 
 
+def render_board_image(board: list[tuple[int]], rows: int, columns: int) -> bytes:
+    """Assemble the image of the board and encode it as a PNG."""
+    with BytesIO() as image_stream:
+        assemble_board_image(board, rows, columns).save(image_stream, format="png")
+        return image_stream.getvalue()
+
+
 def get_card_image(card: tuple[int]) -> Image:
     """Slice the image containing all the cards to get just this card."""
     # The master card image file should have 9x9 cards,
@@ -255,11 +262,8 @@ class DuckGamesDirector(commands.Cog):
 
     async def send_board_embed(self, ctx: commands.Context, game: DuckGame) -> discord.Message:
         """Create and send an embed to display the board."""
-        image = assemble_board_image(game.board, game.rows, game.columns)
-        with BytesIO() as image_stream:
-            image.save(image_stream, format="png")
-            image_stream.seek(0)
-            file = discord.File(fp=image_stream, filename="board.png")
+        image = await self.bot.render.run(render_board_image, game.board, game.rows, game.columns)
+        file = discord.File(fp=BytesIO(image), filename="board.png")
         embed = discord.Embed(
             title="Duck Duck Duck Goose!",
             color=discord.Color.dark_purple(),
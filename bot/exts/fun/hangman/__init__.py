@@ -0,0 +1,9 @@
+from bot.bot import Bot
+from bot.exts.fun.hangman._cog import Hangman
+
+__all__ = ("Hangman",)
+
+
+async def setup(bot: Bot) -> None:
+    """Load the Hangman cog."""
+    await bot.add_cog(Hangman(bot))
@@ -1,17 +1,22 @@
-from pathlib import Path
-import json
+import asyncio
+import io
 from random import choice
 from typing import Dict, Optional, Tuple, Union
 
-from discord import Embed, Message
+from discord import Embed, File, Member, Message
 from discord.ext import commands
 
 from bot.bot import Bot
 from bot.constants import Colours, NEGATIVE_REPLIES
+from bot.exts.fun.hangman._images import GALLOWS_IMAGES, IMAGE_FILENAME
+from bot.exts.fun.hangman._sessions import SessionRegistry
+from bot.exts.fun.hangman._state import HangmanState
+from bot.exts.fun.hangman._stats import HangmanStats
+from bot.exts.fun.hangman._words import WORDS
+from bot.utils.messages import MessageUpdater
 
-# Load word presets from JSON file
-with open(Path("bot/exts/fun/hangman_presets.json")) as f:
-    WORD_PRESETS = json.load(f)["DIFFICULTY_PRESETS"]
+# Difficulty presets, see `DIFFICULTY_PERCENTILES` in `_solver.py`
+DIFFICULTIES = ("easy", "medium", "hard")
 
 # Default parameter ranges for custom games
 DEFAULT_PARAMS = {
@@ -21,18 +26,6 @@ DEFAULT_PARAMS = {
     "max_unique_letters": 25
 }
 
-# Defining a dictionary of images that will be used for the game to represent the hangman person
-IMAGES = {
-    6: "https://cdn.discordapp.com/attachments/859123972884922418/888133201497837598/hangman0.png",
-    5: "https://cdn.discordapp.com/attachments/859123972884922418/888133595259084800/hangman1.png",
-    4: "https://cdn.discordapp.com/attachments/859123972884922418/888134194474139688/hangman2.png",
-    3: "https://cdn.discordapp.com/attachments/859123972884922418/888133758069395466/hangman3.png",
-    2: "https://cdn.discordapp.com/attachments/859123972884922418/888133786724859924/hangman4.png",
-    1: "https://cdn.discordapp.com/attachments/859123972884922418/888133828831477791/hangman5.png",
-    0: "https://cdn.discordapp.com/attachments/859123972884922418/888133845449338910/hangman6.png",
-}
-
-
 class Hangman(commands.Cog):
     """
     Cog for the Hangman game.
@@ -42,6 +35,12 @@ class Hangman(commands.Cog):
 
     def __init__(self, bot: Bot):
         self.bot = bot
+        self.sessions = SessionRegistry()
+        self.stats = HangmanStats()
+
+    async def cog_unload(self) -> None:
+        """Write any buffered game results before the cog goes away."""
+        await self.stats.flush()
 
     @staticmethod
     def parse_arguments(args: Tuple[str, ...]) -> Tuple[Optional[str], Optional[Dict[str, int]], Optional[str]]:
@@ -65,7 +64,7 @@ class Hangman(commands.Cog):
         # Check if using a difficulty preset
         if len(args) == 1:
             difficulty = args[0].lower()
-            if difficulty in WORD_PRESETS:
+            if difficulty in DIFFICULTIES:
                 return difficulty, None, None
             return None, None, f"Invalid difficulty! Please choose from `easy`, `medium`, or `hard`.\nType `.hangman help` for more information."
 
@@ -109,7 +108,7 @@ class Hangman(commands.Cog):
             title="Hangman",
             color=Colours.python_blue,
         )
-        hangman_embed.set_image(url=IMAGES[tries])
+        hangman_embed.set_image(url=f"attachment://{IMAGE_FILENAME}")
         hangman_embed.add_field(
             name=f"You've guessed `{user_guess}` so far.",
             value="Guess the word by sending a message with a letter!"
@@ -120,7 +119,13 @@ class Hangman(commands.Cog):
         hangman_embed.set_footer(text=footer_text)
         return hangman_embed
 
-    @commands.command()
+    @staticmethod
+    async def gallows_file(state: HangmanState) -> File:
+        """Return the image attachment showing the gallows for the current state of a game."""
+        image = (await GALLOWS_IMAGES.get())[state.tries]
+        return File(io.BytesIO(image), filename=IMAGE_FILENAME)
+
+    @commands.group(invoke_without_command=True)
     async def hangman(
             self,
             ctx: commands.Context,
@@ -131,9 +136,9 @@ class Hangman(commands.Cog):
 
         You can play in two ways:
         1. Using difficulty presets:
-           - easy: Shorter words with fewer unique letters
-           - medium: Medium length words with moderate unique letters
-           - hard: Longer words with more unique letters
+           - easy: Words a solver guesses with the fewest misses
+           - medium: Words of moderate difficulty
+           - hard: Words a solver needs the most misses to guess
 
         2. Using custom parameters:
            - min_length: Minimum word length
@@ -168,17 +173,14 @@ class Hangman(commands.Cog):
             return
 
         # Get word based on difficulty preset or custom parameters
+        # The index is built once, so custom games don't recombine and re-measure every word on each command
+        word_index = await WORDS.get()
         if difficulty:
-            word = choice(WORD_PRESETS[difficulty])
+            word = word_index.corpus.choice(difficulty)
         else:
-            # Filter words based on custom parameters
-            filtered_words = [
-                word for word in sum(WORD_PRESETS.values(), [])  # Combine all word lists
-                if custom_params["min_length"] <= len(word) <= custom_params["max_length"]
-                and custom_params["min_unique_letters"] <= len(set(word)) <= custom_params["max_unique_letters"]
-            ]
-
-            if not filtered_words:
+            word = word_index.sample(**custom_params)
+
+            if word is None:
                 no_words_embed = Embed(
                     title=choice(NEGATIVE_REPLIES),
                     description="No words found matching your criteria. Try widening your parameters.",
@@ -187,36 +189,57 @@ class Hangman(commands.Cog):
                 await ctx.send(embed=no_words_embed)
                 return
 
-            word = choice(filtered_words)
+        # Guesses are routed by channel and player, so each player can only run one game per channel
+        if (ctx.channel.id, ctx.author.id) in self.sessions:
+            already_playing_embed = Embed(
+                title=choice(NEGATIVE_REPLIES),
+                description="You already have a game of hangman running in this channel!",
+                color=Colours.soft_red,
+            )
+            await ctx.send(embed=already_playing_embed)
+            return
 
-        # `pretty_word` is used for comparing the indices where the guess of the user is similar to the word
-        # The `user_guess` variable is prettified by adding spaces between every dash, and so is the `pretty_word`
-        pretty_word = "".join([f"{letter} " for letter in word])[:-1]
-        user_guess = ("_ " * len(word))[:-1]
-        tries = 6
-        guessed_letters = set()
+        with self.sessions.open(ctx.channel.id, ctx.author.id) as guesses:
+            await self._play(ctx, word, difficulty, guesses)
 
-        def check(msg: Message) -> bool:
-            return msg.author == ctx.author and msg.channel == ctx.channel
+    async def _play(
+        self,
+        ctx: commands.Context,
+        word: str,
+        difficulty: str | None,
+        guesses: asyncio.Queue[Message],
+    ) -> None:
+        """Run the game loop for `word`, reading the player's messages from `guesses`."""
+        state = HangmanState(word)
 
         original_message = await ctx.send(embed=Embed(
             title="Hangman",
             description="Loading game...",
             color=Colours.soft_green
         ))
+        # Fast guessers would otherwise hit the edit rate limit, so edits are merged and spaced out
+        updater = MessageUpdater(original_message)
+        shown = None
+
+        async def show_state() -> None:
+            """Edit the message to the current state of the game, uploading the gallows only when they change."""
+            nonlocal shown
+            if shown == (state.tries, state.progress):
+                return
+            fields = {"embed": self.create_embed(state.tries, state.progress, difficulty)}
+            if shown is None or shown[0] != state.tries:
+                fields["attachments"] = [await self.gallows_file(state)]
+            shown = (state.tries, state.progress)
+            updater.update(**fields)
 
         # Game loop
-        while user_guess.replace(" ", "") != word:
-            # Edit the message to the current state of the game
-            await original_message.edit(embed=self.create_embed(tries, user_guess, difficulty))
+        while not state.won:
+            await show_state()
 
             try:
-                message = await self.bot.wait_for(
-                    "message",
-                    timeout=60.0,
-                    check=check
-                )
+                message = await asyncio.wait_for(guesses.get(), timeout=60.0)
             except TimeoutError:
+                self.stats.record(ctx.author.id, won=False, guesses=len(state.guessed))
                 timeout_embed = Embed(
                     title="You lost",
                     description=f"Time's up! The correct word was `{word}`.",
@@ -227,6 +250,9 @@ class Hangman(commands.Cog):
 
             # If the user enters a capital letter as their guess, it is automatically converted to a lowercase letter
             normalized_content = message.content.lower()
+            # Messages without text, such as a lone attachment, aren't guesses
+            if not normalized_content:
+                continue
             # The user should only guess one letter per message
             if len(normalized_content) > 1:
                 letter_embed = Embed(
@@ -238,7 +264,7 @@ class Hangman(commands.Cog):
                 continue
 
             # Checks for repeated guesses
-            if normalized_content in guessed_letters:
+            if normalized_content in state.guessed:
                 already_guessed_embed = Embed(
                     title=choice(NEGATIVE_REPLIES),
                     description=f"You have already guessed `{normalized_content}`, try again!",
@@ -247,36 +273,63 @@ class Hangman(commands.Cog):
                 await ctx.send(embed=already_guessed_embed, delete_after=4)
                 continue
 
-            # Checks for correct guesses from the user
-            if normalized_content in word:
-                positions = {idx for idx, letter in enumerate(pretty_word) if letter == normalized_content}
-                user_guess = "".join(
-                    [normalized_content if index in positions else dash for index, dash in enumerate(user_guess)]
+            # Reveals the letter on a correct guess, and costs a try otherwise
+            if not state.guess(normalized_content) and state.lost:
+                losing_embed = Embed(
+                    title="You lost.",
+                    description=f"The word was `{word}`.",
+                    color=Colours.soft_red,
                 )
-            else:
-                tries -= 1
-
-                if tries <= 0:
-                    losing_embed = Embed(
-                        title="You lost.",
-                        description=f"The word was `{word}`.",
-                        color=Colours.soft_red,
-                    )
-                    await original_message.edit(embed=self.create_embed(tries, user_guess, difficulty))
-                    await ctx.send(embed=losing_embed)
-                    return
-
-            guessed_letters.add(normalized_content)
+                await show_state()
+                await updater.flush()
+                self.stats.record(ctx.author.id, won=False, guesses=len(state.guessed))
+                await ctx.send(embed=losing_embed)
+                return
 
         # The loop exited meaning that the user has guessed the word
-        await original_message.edit(embed=self.create_embed(tries, user_guess, difficulty))
+        await show_state()
+        await updater.flush()
         win_embed = Embed(
             title="You won!",
             description=f"The word was `{word}`.",
             color=Colours.grass_green
         )
+        self.stats.record(ctx.author.id, won=True, guesses=len(state.guessed))
         await ctx.send(embed=win_embed)
 
+    @hangman.command(name="leaderboard", aliases=("lb", "top"))
+    async def hangman_leaderboard(self, ctx: commands.Context) -> None:
+        """Show the players with the most hangman wins."""
+        top = await self.stats.leaderboard()
+        leaderboard_embed = Embed(
+            title="Hangman Leaderboard",
+            description="\n".join(
+                f"**{rank}.** <@{user_id}>: {wins} {'win' if wins == 1 else 'wins'}"
+                for rank, (user_id, wins) in enumerate(top, start=1)
+            ) or "Nobody has won a game yet!",
+            color=Colours.python_blue,
+        )
+        leaderboard_embed.set_footer(text="Results can take up to 30 seconds to show up here.")
+        await ctx.send(embed=leaderboard_embed)
+
+    @hangman.command(name="stats")
+    async def hangman_stats(self, ctx: commands.Context, member: Member | None = None) -> None:
+        """Show the hangman record of yourself or another member."""
+        member = member or ctx.author
+        stats = await self.stats.get(member.id)
+        stats_embed = Embed(title=f"Hangman stats for {member.display_name}", color=Colours.python_blue)
+        stats_embed.add_field(name="Wins", value=str(stats.wins))
+        stats_embed.add_field(name="Losses", value=str(stats.losses))
+        stats_embed.add_field(name="Average guesses", value=f"{stats.average_guesses:.1f}")
+        stats_embed.add_field(name="Current streak", value=str(stats.streak))
+        stats_embed.add_field(name="Best streak", value=str(stats.best_streak))
+        await ctx.send(embed=stats_embed)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: Message) -> None:
+        """Route a message to the game its author is playing in that channel, if there is one."""
+        self.sessions.dispatch(message)
+
     async def hangman_help(self, ctx):
         """Displays the help message for Hangman, including difficulty options and custom parameters."""
         help_embed = Embed(
@@ -288,16 +341,19 @@ class Hangman(commands.Cog):
         help_embed.add_field(
             name="Basic Commands",
             value="`hangman`: Start a new game with medium difficulty.\n"
-                "`hangman help`: Show this help message.",
+                "`hangman help`: Show this help message.\n"
+                "`hangman stats [member]`: Show your (or a member's) wins, losses and streaks.\n"
+                "`hangman leaderboard`: Show the players with the most wins.",
             inline=False
         )
 
         help_embed.add_field(
             name="Difficulty Presets",
             value="Choose your difficulty level by typing:\n"
-                "`.hangman easy`: Common words (3-5 letters)\n"
-                "`.hangman medium`: Moderate words (4-8 letters)\n"
-                "`.hangman hard`: Challenging words (8+ letters)",
+                "`.hangman easy`: The easiest third of the words\n"
+                "`.hangman medium`: The middle third of the words\n"
+                "`.hangman hard`: The hardest third of the words\n"
+                "Words are ranked by how many wrong guesses a letter-frequency solver needs to find them.",
             inline=False
         )
 
@@ -331,7 +387,3 @@ class Hangman(commands.Cog):
 
         await ctx.send(embed=help_embed)
 
-
-async def setup(bot: Bot) -> None:
-    """Load the Hangman cog."""
-    await bot.add_cog(Hangman(bot))
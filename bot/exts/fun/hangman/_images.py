@@ -0,0 +1,59 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from bot.utils.resources import LazyResource
+
+IMAGE_FILENAME = "hangman.png"
+IMAGE_SIZE = (240, 260)
+BACKGROUND = (47, 49, 54)
+LINE_COLOUR = (235, 235, 235)
+LINE_WIDTH = 6
+MAX_TRIES = 6
+
+# The gallows, drawn at every stage
+GALLOWS_LINES = (
+    ((30, 240), (150, 240)),
+    ((60, 240), (60, 20)),
+    ((57, 20), (170, 20)),
+    ((170, 20), (170, 50)),
+)
+# Parts of the hanged figure, drawn one per wrong guess; the head is an ellipse, the rest are lines
+HEAD = (150, 50, 190, 90)
+LIMBS = (
+    ((170, 90), (170, 160)),
+    ((170, 110), (140, 140)),
+    ((170, 110), (200, 140)),
+    ((170, 160), (145, 205)),
+    ((170, 160), (195, 205)),
+)
+
+
+def _stage_image(tries: int) -> Image.Image:
+    """Draw the gallows with the figure for `tries` tries remaining."""
+    image = Image.new("RGB", IMAGE_SIZE, BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for line in GALLOWS_LINES:
+        draw.line(line, fill=LINE_COLOUR, width=LINE_WIDTH)
+
+    mistakes = MAX_TRIES - tries
+    if mistakes >= 1:
+        draw.ellipse(HEAD, outline=LINE_COLOUR, width=LINE_WIDTH)
+    for line in LIMBS[:max(mistakes - 1, 0)]:
+        draw.line(line, fill=LINE_COLOUR, width=LINE_WIDTH)
+    return image
+
+
+def _to_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def render_gallows() -> tuple[bytes, ...]:
+    """Render the PNG of every stage, indexed by the number of tries remaining."""
+    return tuple(_to_png(_stage_image(tries)) for tries in range(MAX_TRIES + 1))
+
+
+# Every stage is encoded once, and the same bytes are attached to every game's embed.
+GALLOWS_IMAGES = LazyResource(render_gallows, name="hangman gallows")
@@ -0,0 +1,47 @@
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from discord import Message
+
+SessionKey = tuple[int, int]
+
+
+class SessionRegistry:
+    """
+    Running hangman games, keyed by `(channel_id, author_id)`.
+
+    Each game owns a queue of the messages its player sends in its channel. A single `on_message`
+    listener hands every message to `dispatch`, which finds the game with one dictionary lookup,
+    instead of discord.py evaluating a `wait_for` check per running game for every message.
+    """
+
+    def __init__(self):
+        self._sessions: dict[SessionKey, asyncio.Queue[Message]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        return key in self._sessions
+
+    @contextmanager
+    def open(self, channel_id: int, author_id: int) -> Iterator[asyncio.Queue[Message]]:
+        """Register a game for the given channel and player, yielding the queue its guesses arrive in."""
+        key = (channel_id, author_id)
+        if key in self._sessions:
+            raise KeyError(f"A game is already running for {key}.")
+
+        queue = self._sessions[key] = asyncio.Queue()
+        try:
+            yield queue
+        finally:
+            del self._sessions[key]
+
+    def dispatch(self, message: Message) -> bool:
+        """Queue `message` for the game its author is playing in its channel, returning whether there was one."""
+        queue = self._sessions.get((message.channel.id, message.author.id))
+        if queue is None:
+            return False
+        queue.put_nowait(message)
+        return True
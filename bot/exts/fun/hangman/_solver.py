@@ -0,0 +1,157 @@
+"""
+Difficulty scoring for hangman words.
+
+Every word is scored by playing it against a frequency-based solver: the solver only knows the word's length,
+and always guesses the letter that appears in the most words still consistent with what has been revealed.
+The number of guesses and misses it needs to solve a word measure how hard that word is to guess.
+
+Scores are persisted to `bot/resources/fun/hangman_scores.json`; regenerate them after changing the word lists with
+
+    python -m bot.exts.fun.hangman._solver
+"""
+import hashlib
+import json
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+
+from pydis_core.utils.logging import get_logger
+
+from bot.utils.resources import resource_path
+
+log = get_logger(__name__)
+
+SCORES_FILE = resource_path("fun", "hangman_scores.json")
+
+# Share of the corpus, ordered from easiest to hardest, that each difficulty samples from
+DIFFICULTY_PERCENTILES = {
+    "easy": (0, 33),
+    "medium": (33, 67),
+    "hard": (67, 100),
+}
+
+
+def fingerprint(words: Iterable[str]) -> str:
+    """Return a short hash identifying a word list, used to tell whether persisted scores are stale."""
+    return hashlib.sha256("\n".join(words).encode()).hexdigest()[:16]
+
+
+def _solve_length_group(words: Sequence[str]) -> list[tuple[int, int]]:
+    """
+    Score a group of words of equal length, returning `(guesses, misses)` for each word.
+
+    Candidate sets are bitsets over the group, so filtering every candidate by a guess result is a single AND.
+    Words that the solver can't yet tell apart share their guesses, so the solver's decision tree is walked
+    once for the whole group rather than once per word.
+    """
+    # `containing[letter]` has a bit set for every word containing `letter`, and `by_pattern[letter][mask]`
+    # for every word where `letter` occupies exactly the positions in `mask`; mask 0 is "not in the word".
+    containing: defaultdict[str, int] = defaultdict(int)
+    by_pattern: defaultdict[str, defaultdict[int, int]] = defaultdict(lambda: defaultdict(int))
+    word_masks: list[defaultdict[str, int]] = []
+    for index, word in enumerate(words):
+        masks: defaultdict[str, int] = defaultdict(int)
+        word_masks.append(masks)
+        for position, letter in enumerate(word):
+            masks[letter] |= 1 << position
+        for letter, mask in masks.items():
+            containing[letter] |= 1 << index
+            by_pattern[letter][mask] |= 1 << index
+
+    everything = (1 << len(words)) - 1
+    for letter, bits in containing.items():
+        by_pattern[letter][0] = everything & ~bits
+    letters = sorted(containing)
+    length = len(words[0])
+
+    scores: list[tuple[int, int]] = [(0, 0)] * len(words)
+    # Each node holds the candidates still consistent with the guesses so far and the revealed position count.
+    stack = [(everything, frozenset(), 0, 0, 0)]
+    while stack:
+        candidates, guessed, guesses, misses, revealed = stack.pop()
+        if revealed == length:
+            # Only one word of this length has every position revealed like this.
+            scores[candidates.bit_length() - 1] = (guesses, misses)
+            continue
+
+        best_letter, best_count = "", 0
+        for letter in letters:
+            if letter not in guessed and (count := (candidates & containing[letter]).bit_count()) > best_count:
+                best_letter, best_count = letter, count
+
+        guessed |= {best_letter}
+        patterns = by_pattern[best_letter]
+        if candidates.bit_count() < len(patterns):
+            # With few candidates left, splitting them one by one beats intersecting with every pattern.
+            split: defaultdict[int, int] = defaultdict(int)
+            bits = candidates
+            while bits:
+                lowest = bits & -bits
+                split[word_masks[lowest.bit_length() - 1][best_letter]] |= lowest
+                bits ^= lowest
+            patterns = split
+
+        for mask, bits in patterns.items():
+            if remaining := candidates & bits:
+                stack.append((remaining, guessed, guesses + 1, misses + (mask == 0), revealed + mask.bit_count()))
+
+    return scores
+
+
+def score_words(words: Sequence[str]) -> tuple[array, array]:
+    """Return the number of guesses and misses the solver needs for each word, as two parallel columns."""
+    groups: defaultdict[int, list[int]] = defaultdict(list)
+    for word_id, word in enumerate(words):
+        groups[len(word)].append(word_id)
+
+    guesses = array("B", bytes(len(words)))
+    misses = array("B", bytes(len(words)))
+    for word_ids in groups.values():
+        group_scores = _solve_length_group([words[word_id] for word_id in word_ids])
+        for word_id, (word_guesses, word_misses) in zip(word_ids, group_scores, strict=True):
+            guesses[word_id] = word_guesses
+            misses[word_id] = word_misses
+    return guesses, misses
+
+
+def difficulty_views(guesses: Sequence[int], misses: Sequence[int]) -> dict[str, array]:
+    """Split word ids into difficulties by their percentile when ordered by misses, then guesses."""
+    order = sorted(range(len(guesses)), key=lambda word_id: (misses[word_id], guesses[word_id]))
+    return {
+        difficulty: array("I", order[round(len(order) * low / 100):round(len(order) * high / 100)])
+        for difficulty, (low, high) in DIFFICULTY_PERCENTILES.items()
+    }
+
+
+def load_scores(words: Sequence[str]) -> tuple[array, array]:
+    """Return the persisted scores for `words`, scoring them again if the file is missing or stale."""
+    try:
+        scores = json.loads(SCORES_FILE.read_text("utf8"))
+    except FileNotFoundError:
+        scores = {}
+
+    if scores.get("fingerprint") == fingerprint(words):
+        return array("B", scores["guesses"]), array("B", scores["misses"])
+
+    log.info(f"Hangman scores in {SCORES_FILE.name} don't match the word list, scoring {len(words)} words.")
+    return score_words(words)
+
+
+def save_scores(words: Sequence[str], guesses: Sequence[int], misses: Sequence[int]) -> None:
+    """Persist the scores of `words`."""
+    scores = {"fingerprint": fingerprint(words), "guesses": list(guesses), "misses": list(misses)}
+    SCORES_FILE.write_text(json.dumps(scores, separators=(",", ":")) + "\n", "utf8")
+
+
+def main() -> None:
+    """Score the hangman corpus and persist the result."""
+    from bot.exts.fun.hangman._words import read_corpus
+
+    words = list(read_corpus())
+    guesses, misses = score_words(words)
+    save_scores(words, guesses, misses)
+    log.info(f"Scored {len(words)} words into {SCORES_FILE}.")
+
+
+if __name__ == "__main__":
+    main()
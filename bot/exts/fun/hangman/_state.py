@@ -0,0 +1,55 @@
+class HangmanState:
+    """
+    Progress of a single hangman game.
+
+    Every letter of the word maps to a bitmask of the positions it occupies, so a correct guess is a single
+    OR into the revealed mask and checking for a win is one comparison. The progress string is only
+    re-rendered when the revealed mask changes.
+    """
+
+    __slots__ = ("_letter_masks", "_progress", "_progress_mask", "_solved_mask", "guessed", "revealed", "tries", "word")
+
+    def __init__(self, word: str, tries: int = 6):
+        self.word = word
+        self.tries = tries
+        self.guessed: set[str] = set()
+        self.revealed = 0
+
+        self._letter_masks: dict[str, int] = {}
+        for position, letter in enumerate(word):
+            self._letter_masks[letter] = self._letter_masks.get(letter, 0) | 1 << position
+        self._solved_mask = (1 << len(word)) - 1
+
+        self._progress_mask = -1
+        self._progress = ""
+
+    def guess(self, letter: str) -> bool:
+        """Record a guess of `letter`, returning whether it's in the word; a wrong guess costs a try."""
+        self.guessed.add(letter)
+        mask = self._letter_masks.get(letter)
+        if mask is None:
+            self.tries -= 1
+            return False
+        self.revealed |= mask
+        return True
+
+    @property
+    def won(self) -> bool:
+        """Whether every letter of the word has been revealed."""
+        return self.revealed == self._solved_mask
+
+    @property
+    def lost(self) -> bool:
+        """Whether the player has run out of tries."""
+        return self.tries <= 0
+
+    @property
+    def progress(self) -> str:
+        """The word with unrevealed letters as underscores, separated by spaces, e.g. `h _ n g m _ n`."""
+        if self._progress_mask != self.revealed:
+            revealed = self.revealed
+            self._progress = " ".join(
+                letter if revealed >> position & 1 else "_" for position, letter in enumerate(self.word)
+            )
+            self._progress_mask = revealed
+        return self._progress
@@ -0,0 +1,167 @@
+import asyncio
+import dataclasses
+from dataclasses import dataclass
+
+from async_rediscache import RedisSession
+from pydis_core.utils import scheduling
+from pydis_core.utils.logging import get_logger
+from redis import RedisError
+
+log = get_logger(__name__)
+
+# How many players the cached leaderboard snapshot holds
+LEADERBOARD_SIZE = 25
+# Longest wait between retries of a flush that failed, which back off from the flush interval
+MAX_RETRY_INTERVAL = 10 * 60
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    """A player's hangman record."""
+
+    wins: int = 0
+    losses: int = 0
+    streak: int = 0
+    best_streak: int = 0
+    guesses: int = 0
+
+    @property
+    def games(self) -> int:
+        """Number of games played."""
+        return self.wins + self.losses
+
+    @property
+    def average_guesses(self) -> float:
+        """Average number of letters guessed per game."""
+        return self.guesses / self.games if self.games else 0.0
+
+    def add_result(self, won: bool, guesses: int) -> None:
+        """Update the record with the result of a game."""
+        if won:
+            self.wins += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.losses += 1
+            self.streak = 0
+        self.guesses += guesses
+
+    @classmethod
+    def from_redis(cls, fields: dict[str, str]) -> "PlayerStats":
+        """Create a record from its Redis hash."""
+        return cls(**{name: int(value) for name, value in fields.items() if name in cls.__slots__})
+
+
+class HangmanStats:
+    """
+    Per-player hangman statistics, persisted in Redis.
+
+    Results are buffered in memory and written in pipelined batches, either once `batch_size` results have
+    piled up or `flush_interval` seconds after the first buffered result. Failed flushes are retried, waiting twice
+    as long after each failure, up to `MAX_RETRY_INTERVAL`. Wins are mirrored into a sorted set, from which a
+    snapshot of the top players is cached until the next flush.
+    """
+
+    def __init__(
+        self,
+        redis_session: RedisSession | None = None,
+        *,
+        batch_size: int = 50,
+        flush_interval: float = 30.0,
+    ):
+        self._redis_session = redis_session
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._pending: list[tuple[int, bool, int]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._failed_flushes = 0
+        self._leaderboard: list[tuple[int, int]] | None = None
+
+    @property
+    def redis_session(self) -> RedisSession:
+        """The session results are written to; the bot's session unless another one was given."""
+        return self._redis_session or RedisSession.get_current_session()
+
+    @property
+    def _namespace(self) -> str:
+        global_namespace = self.redis_session.global_namespace
+        return f"{global_namespace}.Hangman.stats" if global_namespace else "Hangman.stats"
+
+    def _player_key(self, user_id: int) -> str:
+        return f"{self._namespace}:players:{user_id}"
+
+    @property
+    def _leaderboard_key(self) -> str:
+        return f"{self._namespace}:leaderboard"
+
+    def record(self, user_id: int, *, won: bool, guesses: int) -> None:
+        """Buffer the result of a game, scheduling a flush to Redis."""
+        self._pending.append((user_id, won, guesses))
+
+        if len(self._pending) >= self.batch_size:
+            scheduling.create_task(self.flush())
+        else:
+            self._schedule_flush(self.flush_interval)
+
+    def _schedule_flush(self, delay: float) -> None:
+        """Schedule a flush in `delay` seconds, unless another one is already scheduled."""
+        if self._flush_task is None or self._flush_task.done() or self._flush_task is asyncio.current_task():
+            self._flush_task = scheduling.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered result to Redis."""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            player_ids = list(dict.fromkeys(user_id for user_id, _, _ in pending))
+            client = self.redis_session.client
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for user_id in player_ids:
+                        pipe.hgetall(self._player_key(user_id))
+                    records = dict(zip(player_ids, map(PlayerStats.from_redis, await pipe.execute()), strict=True))
+
+                for user_id, won, guesses in pending:
+                    records[user_id].add_result(won, guesses)
+
+                async with client.pipeline(transaction=True) as pipe:
+                    for user_id, stats in records.items():
+                        pipe.hset(self._player_key(user_id), mapping=dataclasses.asdict(stats))
+                    pipe.zadd(self._leaderboard_key, {str(user_id): stats.wins for user_id, stats in records.items()})
+                    await pipe.execute()
+            except RedisError:
+                delay = min(self.flush_interval * 2 ** self._failed_flushes, MAX_RETRY_INTERVAL)
+                log.exception(f"Failed to write {len(pending)} hangman results, retrying in {delay:.0f} seconds.")
+                self._pending[:0] = pending
+                self._failed_flushes += 1
+                self._schedule_flush(delay)
+                return
+
+            self._failed_flushes = 0
+            self._leaderboard = None
+            log.trace(f"Flushed {len(pending)} hangman results for {len(player_ids)} players.")
+
+    async def get(self, user_id: int) -> PlayerStats:
+        """Return a player's record, including results that haven't been flushed yet."""
+        stats = PlayerStats.from_redis(await self.redis_session.client.hgetall(self._player_key(user_id)))
+        for pending_id, won, guesses in self._pending:
+            if pending_id == user_id:
+                stats.add_result(won, guesses)
+        return stats
+
+    async def leaderboard(self, limit: int = 10) -> list[tuple[int, int]]:
+        """Return up to `limit` `(user_id, wins)` pairs of the players with the most wins, as of the last flush."""
+        if self._leaderboard is None:
+            top = await self.redis_session.client.zrevrange(
+                self._leaderboard_key, 0, LEADERBOARD_SIZE - 1, withscores=True
+            )
+            self._leaderboard = [(int(user_id), int(wins)) for user_id, wins in top]
+        return self._leaderboard[:limit]
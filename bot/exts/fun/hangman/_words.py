@@ -0,0 +1,189 @@
+import random
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+from bot.exts.fun.hangman._solver import difficulty_views, load_scores
+from bot.utils.resources import LazyResource, resource_path
+
+# The full word corpus; any extra `hangman_words*.txt` file dropped next to it is loaded as well
+WORD_FILES_GLOB = "hangman_words*.txt"
+
+
+class WordCorpus:
+    """
+    A compact, read-only store of hangman words.
+
+    All words live in one packed string, addressed through an offsets array, with the length and unique
+    letter count of every word kept in parallel columns. Named views (such as the difficulty presets)
+    are arrays of word ids into the store rather than separate lists of strings.
+    """
+
+    def __init__(self, words: Iterable[str], views: Mapping[str, Iterable[str]] | None = None):
+        ids: dict[str, int] = {}
+        self.offsets = array("I", [0])
+        self.lengths = array("H")
+        self.unique_letters = array("H")
+        chunks = []
+
+        def add(word: str) -> int:
+            if (word_id := ids.get(word)) is None:
+                word_id = ids[word] = len(self.lengths)
+                chunks.append(word)
+                self.offsets.append(self.offsets[-1] + len(word))
+                self.lengths.append(len(word))
+                self.unique_letters.append(len(set(word)))
+            return word_id
+
+        self.views = {
+            name: array("I", (add(word) for word in view_words))
+            for name, view_words in (views or {}).items()
+        }
+        for word in words:
+            add(word)
+
+        # The id lookup is only needed while building, so only the packed columns are kept around.
+        self._text = "".join(chunks)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[Path], views: Mapping[str, Iterable[str]] | None = None) -> "WordCorpus":
+        """
+        Build a corpus from text files containing one word per line.
+
+        Words are lowercased; blank lines, `#` comments and words that aren't purely alphabetic are skipped.
+        """
+        def read_words() -> Iterable[str]:
+            for path in paths:
+                with path.open(encoding="utf8") as file:
+                    for line in file:
+                        word = line.strip().lower()
+                        if word.isalpha():
+                            yield word
+
+        return cls(read_words(), views)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, word_id: int) -> str:
+        return self._text[self.offsets[word_id]:self.offsets[word_id + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.__getitem__, range(len(self)))
+
+    def choice(self, view: str) -> str:
+        """Return a random word from the named view."""
+        return self[random.choice(self.views[view])]
+
+
+class WordIndex:
+    """
+    Words of a corpus bucketed by `(length, unique letter count)`.
+
+    For every word length a prefix-count table over unique letter counts is kept, so counting the words in a
+    range only touches one table entry pair per length, and sampling walks the buckets instead of building
+    an intermediate list of every matching word.
+    """
+
+    def __init__(self, corpus: WordCorpus):
+        self.corpus = corpus
+        buckets: defaultdict[tuple[int, int], array] = defaultdict(lambda: array("I"))
+        for word_id, (length, unique) in enumerate(zip(corpus.lengths, corpus.unique_letters, strict=True)):
+            buckets[length, unique].append(word_id)
+
+        self.max_length = max((length for length, _ in buckets), default=0)
+        self.max_unique_letters = max((unique for _, unique in buckets), default=0)
+
+        # `_buckets[length][unique]` holds the word ids, `_prefix[length][unique]` the number of words
+        # of that length with strictly fewer than `unique` unique letters.
+        empty = array("I")
+        self._buckets = [
+            [buckets.get((length, unique), empty) for unique in range(self.max_unique_letters + 1)]
+            for length in range(self.max_length + 1)
+        ]
+        self._prefix = []
+        for row in self._buckets:
+            prefix = [0]
+            for bucket in row:
+                prefix.append(prefix[-1] + len(bucket))
+            self._prefix.append(prefix)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "WordIndex":
+        """Build an index over a plain iterable of words."""
+        return cls(WordCorpus(words))
+
+    def __len__(self) -> int:
+        return sum(prefix[-1] for prefix in self._prefix)
+
+    def _clamp(
+        self,
+        min_length: int,
+        max_length: int,
+        min_unique_letters: int,
+        max_unique_letters: int,
+    ) -> tuple[range, int, int]:
+        """Clamp the given bounds to the index, returning the lengths to visit and the unique letter bounds."""
+        lengths = range(max(min_length, 0), min(max_length, self.max_length) + 1)
+        low = max(min_unique_letters, 0)
+        high = min(max_unique_letters, self.max_unique_letters) + 1
+        return lengths, low, max(low, high)
+
+    def count(
+        self,
+        min_length: int,
+        max_length: int,
+        min_unique_letters: int,
+        max_unique_letters: int,
+    ) -> int:
+        """Return how many words fall within the given (inclusive) length and unique letter ranges."""
+        lengths, low, high = self._clamp(min_length, max_length, min_unique_letters, max_unique_letters)
+        if low > self.max_unique_letters:
+            return 0
+        return sum(self._prefix[length][high] - self._prefix[length][low] for length in lengths)
+
+    def sample(
+        self,
+        min_length: int,
+        max_length: int,
+        min_unique_letters: int,
+        max_unique_letters: int,
+    ) -> str | None:
+        """Return a uniformly random word within the given (inclusive) ranges, or None if there is none."""
+        total = self.count(min_length, max_length, min_unique_letters, max_unique_letters)
+        if not total:
+            return None
+
+        lengths, low, high = self._clamp(min_length, max_length, min_unique_letters, max_unique_letters)
+        position = random.randrange(total)
+        for length in lengths:
+            prefix = self._prefix[length]
+            in_range = prefix[high] - prefix[low]
+            if position >= in_range:
+                position -= in_range
+                continue
+
+            for bucket in self._buckets[length][low:high]:
+                if position < len(bucket):
+                    return self.corpus[bucket[position]]
+                position -= len(bucket)
+
+        # Unreachable as long as `count` and the buckets agree.
+        return None
+
+
+def read_corpus() -> WordCorpus:
+    """Read every hangman word file into a corpus."""
+    return WordCorpus.from_files(sorted(resource_path("fun").glob(WORD_FILES_GLOB)))
+
+
+def load_words() -> WordIndex:
+    """Read and index every word; the difficulties become views of the corpus, split by solver score."""
+    corpus = read_corpus()
+    corpus.views.update(difficulty_views(*load_scores(corpus)))
+    return WordIndex(corpus)
+
+
+# Parsed on the first game rather than at import, so unused cogs don't slow down startup.
+WORDS = LazyResource(load_words, name="hangman words")
@@ -16,6 +16,7 @@ from pydis_core.utils.paste_service import PasteFile, PasteTooLongError, PasteUp
 from bot.bot import Bot
 from bot.constants import Channels, WHITELISTED_CHANNELS
 from bot.utils.decorators import whitelist_override
+from bot.utils.encoding import EncodedImage, encode_image, file_extension
 
 log = get_logger(__name__)
 FORMATTED_CODE_REGEX = re.compile(
@@ -52,8 +53,8 @@ def _prepare_input(text: str) -> str:
     return text
 
 
-def _process_image(data: bytes, out_file: BinaryIO) -> None:
-    """Read `data` as an image file, and paste it on a white background."""
+def _process_image(data: bytes) -> EncodedImage:
+    """Read `data` as an image file, and paste it on a white background, returning the result encoded."""
     image = Image.open(BytesIO(data)).convert("RGBA")
     width, height = image.size
     background = Image.new("RGBA", (width + 2 * PAD, height + 2 * PAD), "WHITE")
@@ -62,7 +63,8 @@ def _process_image(data: bytes, out_file: BinaryIO) -> None:
     # when an RGBA image is passed as the mask, its alpha band is used.
     # this has the effect of skipping pasting the pixels where the image is transparent.
     background.paste(image, (PAD, PAD), image)
-    background.save(out_file)
+    # The background is opaque, so dropping the alpha channel lets images with few colours be stored as palettes.
+    return encode_image(background.convert("RGB"))
 
 
 class InvalidLatexError(Exception):
@@ -97,7 +99,9 @@ class Latex(commands.Cog):
             f"{LATEX_API_URL}/{response_json['filename']}",
             raise_for_status=True
         ) as response:
-            _process_image(await response.read(), out_file)
+            image = await self.bot.render.run(_process_image, await response.read())
+        image.report(self.bot.stats, "latex")
+        out_file.write(image.data)
 
     async def _upload_to_pastebin(self, text: str) -> str | None:
         """Uploads `text` to the paste service, returning the url if successful."""
@@ -147,7 +151,9 @@ class Latex(commands.Cog):
                     await ctx.send(embed=embed)
                     image_path.unlink()
                     return
-            await ctx.send(file=discord.File(image_path, "latex.png"))
+            with open(image_path, "rb") as image_file:
+                extension = file_extension(image_file.read(4))
+            await ctx.send(file=discord.File(image_path, f"latex{extension}"))
 
 
 async def setup(bot: Bot) -> None:
@@ -0,0 +1,135 @@
+"""
+Compositing snake cards from their static layers.
+
+Everything on a card but the snake's picture and the text under it depends only on the card's back and height,
+so the tiled back and the frame drawn over it are built once per back and height bucket, and cached. A card is
+then a crop of those layers, with the picture and the bottom of the frame pasted in, and the text panel and
+text drawn on, from a cached mask of the text. Cards are drawn in the render service's workers, so each worker
+has its own caches.
+"""
+import math
+import random
+import textwrap
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from bot.utils.encoding import EncodedImage, encode_image
+
+CARD_RESOURCES = Path("bot/resources/fun/snakes/snake_cards")
+CARD = {
+    "top": Image.open(CARD_RESOURCES / "card_top.png"),
+    "frame": Image.open(CARD_RESOURCES / "card_frame.png"),
+    "bottom": Image.open(CARD_RESOURCES / "card_bottom.png"),
+    "backs": [Image.open(file) for file in sorted((CARD_RESOURCES / "backs").iterdir())],
+    "font": ImageFont.truetype(str(CARD_RESOURCES / "expressway.ttf"), 20),
+}
+
+ICON_WIDTH = 347  # Hardcoded, not much i can do about that
+ICON_POSITION = (36, CARD["top"].height)  # Also hardcoded :(
+MARGIN = 36
+PANEL_COLOUR = (63, 63, 63, 128)
+TEXT_COLOUR = (255, 255, 255, 255)
+# Cached layers are built to the next multiple of this height, and cropped to each card's
+LAYER_HEIGHT_STEP = 256
+LAYER_CACHE_SIZE = 16
+TEXT_CACHE_SIZE = 64
+
+
+@lru_cache(LAYER_CACHE_SIZE)
+def _back_layer(back_index: int, height: int) -> Image.Image:
+    """Returns the back at `back_index` tiled down a transparent card of the given height."""
+    back = CARD["backs"][back_index]
+    layer = Image.new("RGBA", (CARD["frame"].width, height), (0, 0, 0, 0))
+    for offset in range(height // back.height + 1):
+        layer.paste(back, (16, 16 + offset * back.height))
+    return layer
+
+
+@lru_cache(LAYER_CACHE_SIZE)
+def _frame_layer(back_index: int, height: int) -> Image.Image:
+    """Returns the top and sides of the frame over the back at `back_index`, for a card of the given height."""
+    frame = Image.new("RGBA", (CARD["frame"].width, height), (0, 0, 0, 0))
+    frame.paste(CARD["top"], (0, 0))
+    for offset in range((height - CARD["top"].height) // CARD["frame"].height + 1):
+        frame.paste(CARD["frame"], (0, CARD["top"].height + offset * CARD["frame"].height))
+
+    layer = _back_layer(back_index, height).copy()
+    layer.paste(frame, (0, 0), frame)
+    return layer
+
+
+@lru_cache(LAYER_CACHE_SIZE)
+def _panel(size: tuple[int, int]) -> Image.Image:
+    """Returns the translucent panel behind a card's text, at the given size."""
+    return Image.new("RGBA", size, PANEL_COLOUR)
+
+
+@lru_cache(TEXT_CACHE_SIZE)
+def _text_mask(description: str) -> Image.Image:
+    """
+    Returns a mask of `description` wrapped into lines, to be pasted at the top of a card's text panel.
+
+    Rendering text is most of the work of drawing a card, so the mask is cached for cards of the same snake.
+    """
+    # Text runs from the top of the panel to the bottom of the card, which are the same distance apart on every card
+    mask = Image.new("L", (CARD["frame"].width, CARD["bottom"].height - MARGIN), 0)
+    draw = ImageDraw.Draw(mask)
+    offset = 0
+    for line in textwrap.wrap(description, 36):
+        draw.text((MARGIN + 4, offset), line, fill=255, font=CARD["font"])
+
+        _left, top, _right, bottom = CARD["font"].getbbox(line)
+        # Height of the text + 4px spacing
+        offset += bottom - top + 4
+    return mask
+
+
+def _paste_over_back(card: Image.Image, image: Image.Image, position: tuple[int, int], back: Image.Image) -> None:
+    """Pastes `image` onto `card` over the back alone, hiding whatever of the frame was drawn there."""
+    box = (*position, position[0] + image.width, position[1] + image.height)
+    card.paste(back.crop(box), box)
+    card.paste(image, position, image)
+
+
+def compose_card(image_bytes: bytes, info: str) -> Image.Image:
+    """
+    Generate a card from a snake's picture and information.
+
+    Written by juan and Someone during the first code jam.
+    """
+    snake = Image.open(BytesIO(image_bytes))
+
+    # Get the size of the snake icon, configure the height of the image box (yes, it changes)
+    icon_height = int((ICON_WIDTH / snake.width) * snake.height)
+    snake.thumbnail((ICON_WIDTH, icon_height))
+
+    # Get the dimensions of the final image, and crop it from the cached layers with a random back
+    main_height = icon_height + CARD["top"].height + CARD["bottom"].height
+    main_width = CARD["frame"].width
+    layer_height = math.ceil(main_height / LAYER_HEIGHT_STEP) * LAYER_HEIGHT_STEP
+    back_index = random.randrange(len(CARD["backs"]))
+    back = _back_layer(back_index, layer_height)
+    card = _frame_layer(back_index, layer_height).crop((0, 0, main_width, main_height))
+
+    # Add the image and bottom part of the image, which hide the frame under them
+    _paste_over_back(card, snake.convert("RGBA"), ICON_POSITION, back)
+    _paste_over_back(card, CARD["bottom"], (0, CARD["top"].height + icon_height), back)
+
+    # Draw a semi-transparent panel behind the first two sentences of the info
+    description = ".".join(info.split(".")[:2]) + "."
+    offset = CARD["top"].height + icon_height + MARGIN
+    panel = _panel((main_width - 2 * MARGIN + 1, main_height - MARGIN - offset + 1))
+    card.paste(panel, (MARGIN, offset), panel)
+
+    # Draw the text onto the final image
+    card.paste(TEXT_COLOUR, (0, offset), _text_mask(description))
+
+    return card
+
+
+def render_card(image_bytes: bytes, info: str) -> EncodedImage:
+    """Generate a card from a snake's picture and information, encoded to be sent."""
+    return encode_image(compose_card(image_bytes, info))
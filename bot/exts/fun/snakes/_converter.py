@@ -3,9 +3,11 @@ import random
 from collections.abc import Iterable
 
 import discord
+import numpy as np
 from discord.ext.commands import Context, Converter
 from pydis_core.utils.logging import get_logger
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 
 from bot.exts.fun.snakes._utils import SNAKE_RESOURCES
 from bot.utils import disambiguate
@@ -13,11 +15,92 @@ from bot.utils import disambiguate
 log = get_logger(__name__)
 
 
+# Lowest score, out of 100, for a name to be offered as a fuzzy match
+FUZZY_SCORE_CUTOFF = 80
+# Names are indexed by the prefixes of their words up to this long; longer prefixes are checked against them
+PREFIX_DEPTH = 6
+
+
+class _TrieNode:
+    """A node of a prefix trie, holding the indices of the names under it."""
+
+    __slots__ = ("children", "matches")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.matches: list[int] = []
+
+
+class SnakeNameIndex:
+    """
+    An index of the common and scientific names of snakes, for finding the ones a user means.
+
+    Names are normalised with rapidfuzz's default processor, which lowercases them and replaces punctuation with
+    spaces. Exact matches are looked up in a dict, which needs no fuzzy matching. Otherwise, names with a word
+    starting with the query are found in a prefix trie and offered first, followed by the other names similar to
+    the query, scored against every name at once.
+    """
+
+    def __init__(self, snakes: Iterable[dict[str, str]]):
+        self.scientific_names = {snake["name"]: snake["scientific"] for snake in snakes}
+        self.names = sorted(self.scientific_names.keys() | self.scientific_names.values())
+        self.normalised = [default_process(name) for name in self.names]
+
+        self.exact: dict[str, int] = {}
+        self.trie = _TrieNode()
+        for index, name in enumerate(self.normalised):
+            self.exact.setdefault(name, index)
+            # Index the name from the start of each of its words, so a query can match any of them.
+            for start in (0, *(position + 1 for position, char in enumerate(name) if char == " ")):
+                node = self.trie
+                for char in name[start:start + PREFIX_DEPTH]:
+                    node = node.children.setdefault(char, _TrieNode())
+                    if not node.matches or node.matches[-1] != index:
+                        node.matches.append(index)
+
+    def _prefix_matches(self, query: str) -> list[int]:
+        """Returns the indices of names with a word starting with `query`."""
+        node = self.trie
+        for char in query[:PREFIX_DEPTH]:
+            if (node := node.children.get(char)) is None:
+                return []
+        if len(query) <= PREFIX_DEPTH:
+            return node.matches
+        return [index for index in node.matches if f" {query}" in f" {self.normalised[index]}"]
+
+    def _fuzzy_matches(self, query: str) -> list[int]:
+        """Returns the indices of names similar to `query`, or to a part of it, from the most similar."""
+        scores = np.maximum(*(
+            process.cdist([query], self.normalised, scorer=scorer, score_cutoff=FUZZY_SCORE_CUTOFF)[0]
+            for scorer in (fuzz.ratio, fuzz.partial_ratio)
+        ))
+        matches = np.flatnonzero(scores)
+        return matches[np.argsort(-scores[matches], kind="stable")].tolist()
+
+    def find(self, query: str) -> list[str]:
+        """
+        Returns the names that `query` could refer to.
+
+        This is the name `query` is, if any, otherwise the names with a word starting with `query`, followed by
+        the other names similar enough to it.
+        """
+        query = default_process(query)
+        if not query:
+            return []
+        if (index := self.exact.get(query)) is not None:
+            return [self.names[index]]
+
+        matches = dict.fromkeys(self._prefix_matches(query))
+        matches.update(dict.fromkeys(self._fuzzy_matches(query)))
+        return [self.names[index] for index in matches]
+
+
 class Snake(Converter):
     """Snake converter for the Snakes Cog."""
 
     snakes = None
     special_cases = None
+    index = None
 
     async def convert(self, ctx: Context, name: str) -> str:
         """Convert the input snake name to the closest matching Snake object."""
@@ -27,43 +110,26 @@ class Snake(Converter):
         if name == "python":
             return "Python (programming language)"
 
-        def get_potential(iterable: Iterable, *, threshold: int = 80) -> list[str]:
-            nonlocal name
-            potential = []
-
-            for item in iterable:
-                original, item = item, item.lower()
-
-                if name == item:
-                    return [original]
-
-                a, b = fuzz.ratio(name, item), fuzz.partial_ratio(name, item)
-                if a >= threshold or b >= threshold:
-                    potential.append(original)
-
-            return potential
-
         # Handle special cases
         if name.lower() in self.special_cases:
             return self.special_cases.get(name.lower(), name.lower())
 
-        names = {snake["name"]: snake["scientific"] for snake in self.snakes}
-        all_names = names.keys() | names.values()
-        timeout = len(all_names) * (3 / 4)
+        timeout = len(self.index.names) * (3 / 4)
 
         embed = discord.Embed(
             title="Found multiple choices. Please choose the correct one.", colour=0x59982F)
         embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
 
-        name = await disambiguate(ctx, get_potential(all_names), timeout=timeout, embed=embed)
-        return names.get(name, name)
+        name = await disambiguate(ctx, self.index.find(name), timeout=timeout, embed=embed)
+        return self.index.scientific_names.get(name, name)
 
     @classmethod
     async def build_list(cls) -> None:
-        """Build list of snakes from the static snake resources."""
+        """Build list of snakes from the static snake resources, and the index of their names."""
         # Get all the snakes
         if cls.snakes is None:
             cls.snakes = json.loads((SNAKE_RESOURCES / "snake_names.json").read_text("utf8"))
+            cls.index = SnakeNameIndex(cls.snakes)
         # Get the special cases
         if cls.special_cases is None:
             special_cases = json.loads((SNAKE_RESOURCES / "special_snakes.json").read_text("utf8"))
@@ -1,16 +1,13 @@
 import asyncio
 import colorsys
-import os
 import random
 import re
 import string
-import textwrap
 import urllib
-from functools import partial
 from io import BytesIO
-from typing import Any
+from typing import Any, Literal
 
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
 from aiohttp import ClientTimeout
 from discord import Colour, Embed, File, Member, Message, Reaction
 from discord.errors import HTTPException
@@ -18,10 +15,12 @@ from discord.ext.commands import Cog, CommandError, Context, bot_has_permissions
 from pydis_core.utils.logging import get_logger
 
 from bot.bot import Bot
-from bot.constants import ERROR_REPLIES, Tokens
+from bot.constants import ERROR_REPLIES, MODERATION_ROLES, Tokens
 from bot.exts.fun.snakes import _utils as utils
+from bot.exts.fun.snakes._card import render_card
 from bot.exts.fun.snakes._converter import Snake
-from bot.utils.decorators import locked
+from bot.exts.fun.snakes._wiki_cache import SnakeInfoCache
+from bot.utils.decorators import locked, with_role
 
 log = get_logger(__name__)
 
@@ -119,17 +118,6 @@ CORRECT_GUESS = (
     "Are you cheating?"
 )
 
-# snake card consts
-CARD = {
-    "top": Image.open("bot/resources/fun/snakes/snake_cards/card_top.png"),
-    "frame": Image.open("bot/resources/fun/snakes/snake_cards/card_frame.png"),
-    "bottom": Image.open("bot/resources/fun/snakes/snake_cards/card_bottom.png"),
-    "backs": [
-        Image.open(f"bot/resources/fun/snakes/snake_cards/backs/{file}")
-        for file in os.listdir("bot/resources/fun/snakes/snake_cards/backs")
-    ],
-    "font": ImageFont.truetype("bot/resources/fun/snakes/snake_cards/expressway.ttf", 20)
-}
 # endregion
 
 
@@ -153,6 +141,7 @@ class Snakes(Cog):
         self.snake_quizzes = utils.get_resource("snake_quiz")
         self.snake_facts = utils.get_resource("snake_facts")
         self.num_movie_pages = None
+        self.snake_info = SnakeInfoCache(self._fetch_snek)
 
     # region: Helper methods
     @staticmethod
@@ -170,90 +159,6 @@ class Snakes(Cog):
 
         return int(hex_rgb, 16)
 
-    @staticmethod
-    def _generate_card(buffer: BytesIO, content: dict) -> BytesIO:
-        """
-        Generate a card from snake information.
-
-        Written by juan and Someone during the first code jam.
-        """
-        snake = Image.open(buffer)
-
-        # Get the size of the snake icon, configure the height of the image box (yes, it changes)
-        icon_width = 347  # Hardcoded, not much i can do about that
-        icon_height = int((icon_width / snake.width) * snake.height)
-        frame_copies = icon_height // CARD["frame"].height + 1
-        snake.thumbnail((icon_width, icon_height))
-
-        # Get the dimensions of the final image
-        main_height = icon_height + CARD["top"].height + CARD["bottom"].height
-        main_width = CARD["frame"].width
-
-        # Start creating the foreground
-        foreground = Image.new("RGBA", (main_width, main_height), (0, 0, 0, 0))
-        foreground.paste(CARD["top"], (0, 0))
-
-        # Generate the frame borders to the correct height
-        for offset in range(frame_copies):
-            position = (0, CARD["top"].height + offset * CARD["frame"].height)
-            foreground.paste(CARD["frame"], position)
-
-        # Add the image and bottom part of the image
-        foreground.paste(snake, (36, CARD["top"].height))  # Also hardcoded :(
-        foreground.paste(CARD["bottom"], (0, CARD["top"].height + icon_height))
-
-        # Setup the background
-        back = random.choice(CARD["backs"])
-        back_copies = main_height // back.height + 1
-        full_image = Image.new("RGBA", (main_width, main_height), (0, 0, 0, 0))
-
-        # Generate the tiled background
-        for offset in range(back_copies):
-            full_image.paste(back, (16, 16 + offset * back.height))
-
-        # Place the foreground onto the final image
-        full_image.paste(foreground, (0, 0), foreground)
-
-        # Get the first two sentences of the info
-        description = ".".join(content["info"].split(".")[:2]) + "."
-
-        # Setup positioning variables
-        margin = 36
-        offset = CARD["top"].height + icon_height + margin
-
-        # Create blank rectangle image which will be behind the text
-        rectangle = Image.new(
-            "RGBA",
-            (main_width, main_height),
-            (0, 0, 0, 0)
-        )
-
-        # Draw a semi-transparent rectangle on it
-        rect = ImageDraw.Draw(rectangle)
-        rect.rectangle(
-            (margin, offset, main_width - margin, main_height - margin),
-            fill=(63, 63, 63, 128)
-        )
-
-        # Paste it onto the final image
-        full_image.paste(rectangle, (0, 0), mask=rectangle)
-
-        # Draw the text onto the final image
-        draw = ImageDraw.Draw(full_image)
-        for line in textwrap.wrap(description, 36):
-            draw.text((margin + 4, offset), line, font=CARD["font"])
-
-            _left, top, _right, bottom = CARD["font"].getbbox(line)
-            # Height of the text + 4px spacing
-            offset += bottom - top + 4
-
-        # Get the image contents as a BufferIO object
-        buffer = BytesIO()
-        full_image.save(buffer, "PNG")
-        buffer.seek(0)
-
-        return buffer
-
     @staticmethod
     def _snakify(message: str) -> str:
         """Sssnakifffiesss a sstring."""
@@ -301,6 +206,10 @@ class Snakes(Cog):
         return long_message
 
     async def _get_snek(self, name: str) -> dict[str, Any]:
+        """Gets the data from the wikipedia article about a snake, from the cache if it's there."""
+        return await self.snake_info.get(name)
+
+    async def _fetch_snek(self, name: str) -> dict[str, Any]:
         """
         Fetches all the data from a wikipedia article about a snake.
 
@@ -592,10 +501,12 @@ class Snakes(Cog):
         await board_id.clear_reactions()
 
     @snakes_group.command(name="draw")
-    async def draw_command(self, ctx: Context) -> None:
+    async def draw_command(self, ctx: Context, animate: Literal["--animate"] | None = None) -> None:
         """
         Draws a random snek using Perlin noise.
 
+        With `--animate`, the snek slithers in a looping GIF.
+
         Written by Momo and kel.
         Modified by juan and lemon.
         """
@@ -615,6 +526,23 @@ class Snakes(Cog):
 
             # Build and send the snek
             text = random.choice(self.snake_idioms)["idiom"]
+            if animate:
+                segment_lengths = np.array([
+                    random.randint(*utils.DEFAULT_SEGMENT_LENGTH_RANGE) for _ in range(length)
+                ], dtype=float)
+                paths = utils.snek_animation_paths(utils.PerlinNoise(3, octaves=2), segment_lengths, utils.SNEK_FRAMES)
+                gif = await utils.create_snek_animation(
+                    self.bot.render,
+                    paths,
+                    snake_width=width,
+                    snake_color=snek_color,
+                    text=text,
+                    text_color=text_color,
+                    bg_color=bg_color
+                )
+                await ctx.send(file=File(BytesIO(gif), filename="snek.gif"))
+                return
+
             factory = utils.PerlinNoiseFactory(dimension=1, octaves=2)
             image_frame = utils.create_snek_frame(
                 factory,
@@ -625,9 +553,7 @@ class Snakes(Cog):
                 text_color=text_color,
                 bg_color=bg_color
             )
-            png_bytes = utils.frame_to_png_bytes(image_frame)
-            file = File(png_bytes, filename="snek.png")
-            await ctx.send(file=file)
+            await ctx.send(file=await utils.frame_to_file(self.bot.render, image_frame, "snek.png"))
 
     @snakes_group.command(name="get")
     @bot_has_permissions(manage_messages=True)
@@ -1009,19 +935,26 @@ class Snakes(Cog):
 
         # Make the card
         async with ctx.typing():
-            stream = BytesIO()
             async with self.bot.http_session.get(image_url, timeout=ClientTimeout(total=10)) as response:
-                stream.write(await response.read())
-
-            stream.seek(0)
+                image_bytes = await response.read()
 
-            func = partial(self._generate_card, stream, content)
-            final_buffer = await self.bot.loop.run_in_executor(None, func)
+            card = await self.bot.render.run(render_card, image_bytes, content["info"])
+        card.report(self.bot.stats, "snake_card")
 
         # Send it!
         await ctx.send(
             f"A wild {content['name'].title()} appears!",
-            file=File(final_buffer, filename=content["name"].replace(" ", "") + ".png")
+            file=card.to_file(content["name"].replace(" ", "") + ".png")
+        )
+
+    @snakes_group.command(name="prewarm")
+    @with_role(*MODERATION_ROLES)
+    async def prewarm_command(self, ctx: Context) -> None:
+        """Fetches the Wikipedia articles of every snake that isn't cached yet, so lookups don't wait for them."""
+        async with ctx.typing():
+            fetched = await self.snake_info.prewarm(snake["scientific"] for snake in self.snake_names)
+        await ctx.send(
+            f"Fetched {fetched} of {len(self.snake_names)} snakes; the rest were cached already or couldn't be fetched."
         )
 
     @snakes_group.command(name="fact")
@@ -1,17 +1,23 @@
+import asyncio
 import io
 import json
 import math
 import random
-from itertools import product
+from itertools import pairwise, product
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 from PIL.ImageDraw import ImageDraw
 from discord import File, Member, Reaction, User
 from discord.ext.commands import Cog, Context
+from numpy.typing import ArrayLike
 from pydis_core.utils.logging import get_logger
 
 from bot.constants import Emojis, MODERATION_ROLES
+from bot.utils.encoding import encode_image
+from bot.utils.gif import splice_gifs
+from bot.utils.render import RenderService
 
 SNAKE_RESOURCES = Path("bot/resources/fun/snakes").absolute()
 
@@ -113,6 +119,15 @@ DEFAULT_TEXT_COLOR = 0xf2ea15
 X = 0
 Y = 1
 ANGLE_RANGE = math.pi * 2
+# Frames of animated sneks, drawn in chunks spread over the render workers, and the limit on their GIF's size
+SNEK_FRAMES = 36
+SNEK_FRAMES_PER_CHUNK = 12
+SNEK_FRAME_DURATION = 80
+MAX_SNEK_ANIMATION_BYTES = 4 * 1024 * 1024
+# Radius of the circle animated sneks' noise is looked up around; larger ones make them wriggle more
+SNEK_LOOP_RADIUS = 0.25
+# Number of gradients Perlin noise picks from, and so the period of its grid
+PERLIN_TABLE_SIZE = 256
 
 
 def get_resource(file: str) -> list[dict]:
@@ -130,21 +145,29 @@ def lerp(t: float, a: float, b: float) -> float:
     return a + t * (b - a)
 
 
-class PerlinNoiseFactory:
+class PerlinNoise:
     """
-    Callable that produces Perlin noise for an arbitrary point in an arbitrary number of dimensions.
-
-    The underlying grid is aligned with the integers.
+    Perlin noise in an arbitrary number of dimensions, evaluated for whole arrays of points at once.
 
-    There is no limit to the coordinates used; new gradients are generated on the fly as necessary.
+    The underlying grid is aligned with the integers. Each grid point's gradient is picked from a table of
+    `PERLIN_TABLE_SIZE` random gradients, by hashing its coordinates through a permutation table, so the noise
+    repeats every `PERLIN_TABLE_SIZE` units. Both tables are generated from `seed`, and the same seed always
+    gives the same noise; without one, the noise is different each time.
 
-    Taken from: https://gist.github.com/eevee/26f547457522755cb1fb8739d0ea89a1
+    Based on: https://gist.github.com/eevee/26f547457522755cb1fb8739d0ea89a1
     Licensed under ISC
     """
 
-    def __init__(self, dimension: int, octaves: int = 1, tile: tuple[int, ...] = (), unbias: bool = False):
+    def __init__(
+        self,
+        dimension: int,
+        octaves: int = 1,
+        tile: tuple[int, ...] = (),
+        unbias: bool = False,
+        seed: int | None = None,
+    ):
         """
-        Create a new Perlin noise factory in the given number of dimensions.
+        Create a new Perlin noise generator in the given number of dimensions.
 
         dimension should be an integer and at least 1.
 
@@ -152,7 +175,7 @@ class PerlinNoiseFactory:
 
         ``tile`` can be used to make a seamlessly tiling pattern.
         For example:
-            pnf = PerlinNoiseFactory(2, tile=(0, 3))
+            noise = PerlinNoise(2, tile=(0, 3))
 
         This will produce noise that tiles every 3 units vertically, but never tiles horizontally.
 
@@ -161,100 +184,72 @@ class PerlinNoiseFactory:
         """
         self.dimension = dimension
         self.octaves = octaves
-        self.tile = tile + (0,) * dimension
+        self.tile = np.array((tile + (0,) * dimension)[:dimension])
         self.unbias = unbias
 
         # For n dimensions, the range of Perlin noise is ±sqrt(n)/2; multiply
         # by this to scale to ±1
         self.scale_factor = 2 * dimension ** -0.5
 
-        self.gradient = {}
-
-    def _generate_gradient(self) -> tuple[float, ...]:
-        """
-        Generate a random unit vector at each grid point.
-
-        This is the "gradient" vector, in that the grid tile slopes towards it
-        """
+        rng = np.random.default_rng(seed)
+        self.permutation = rng.permutation(PERLIN_TABLE_SIZE)
         # 1 dimension is special, since the only unit vector is trivial;
         # instead, use a slope between -1 and 1
-        if self.dimension == 1:
-            return (random.uniform(-1, 1),)
-
-        # Generate a random point on the surface of the unit n-hypersphere;
-        # this is the same as a random unit vector in n dimensions.  Thanks
-        # to: http://mathworld.wolfram.com/SpherePointPicking.html
-        # Pick n normal random variables with stddev 1
-        random_point = [random.gauss(0, 1) for _ in range(self.dimension)]
-        # Then scale the result to a unit vector
-        scale = sum(n * n for n in random_point) ** -0.5
-        return tuple(coord * scale for coord in random_point)
-
-    def get_plain_noise(self, *point) -> float:
-        """Get plain noise for a single point, without taking into account either octaves or tiling."""
-        if len(point) != self.dimension:
-            raise ValueError(
-                f"Expected {self.dimension} values, got {len(point)}"
-            )
-
-        # Build a list of the (min, max) bounds in each dimension
-        grid_coords = []
-        for coord in point:
-            min_coord = math.floor(coord)
-            max_coord = min_coord + 1
-            grid_coords.append((min_coord, max_coord))
+        if dimension == 1:
+            self.gradients = rng.uniform(-1, 1, (PERLIN_TABLE_SIZE, 1))
+        else:
+            # Normal random variables scaled to unit length are uniformly distributed on the unit
+            # n-hypersphere, i.e. random unit vectors: http://mathworld.wolfram.com/SpherePointPicking.html
+            gradients = rng.normal(size=(PERLIN_TABLE_SIZE, dimension))
+            self.gradients = gradients / np.linalg.norm(gradients, axis=1, keepdims=True)
+
+        # Offsets from a point's cell to each of its corners, ordered such that the last dimension alternates
+        self.corners = np.array(list(product((0, 1), repeat=dimension)))
+
+    def _points(self, points: ArrayLike) -> np.ndarray:
+        """Returns `points` as an array with one row per point, where 1D points may also be given as scalars."""
+        points = np.asarray(points, dtype=float)
+        if self.dimension == 1 and points.ndim == 1:
+            points = points[:, np.newaxis]
+        if points.ndim != 2 or points.shape[1] != self.dimension:
+            raise ValueError(f"Expected points of {self.dimension} values, got an array of shape {points.shape}")
+        return points
+
+    def plain_noise(self, points: ArrayLike) -> np.ndarray:
+        """Get plain noise for each of `points`, without taking into account either octaves or tiling."""
+        points = self._points(points)
+        cells = np.floor(points)
+        offsets = points - cells
+
+        # Hash each corner of each point's cell to the index of its gradient.
+        corners = cells.astype(np.int64)[:, np.newaxis, :] + self.corners
+        indices = np.zeros(corners.shape[:2], dtype=np.int64)
+        for axis in range(self.dimension):
+            indices = self.permutation[(indices + corners[..., axis]) % PERLIN_TABLE_SIZE]
 
         # Compute the dot product of each gradient vector and the point's
         # distance from the corresponding grid point.  This gives you each
         # gradient's "influence" on the chosen point.
-        dots = []
-        for grid_point in product(*grid_coords):
-            if grid_point not in self.gradient:
-                self.gradient[grid_point] = self._generate_gradient()
-            gradient = self.gradient[grid_point]
-
-            dot = 0
-            for i in range(self.dimension):
-                dot += gradient[i] * (point[i] - grid_point[i])
-            dots.append(dot)
-
-        # Interpolate all those dot products together.  The interpolation is
-        # done with smoothstep to smooth out the slope as you pass from one
-        # grid cell into the next.
-        # Due to the way product() works, dot products are ordered such that
-        # the last dimension alternates: (..., min), (..., max), etc.  So we
-        # can interpolate adjacent pairs to "collapse" that last dimension.  Then
-        # the results will alternate in their second-to-last dimension, and so
-        # forth, until we only have a single value left.
-        dim = self.dimension
-        while len(dots) > 1:
-            dim -= 1
-            s = smoothstep(point[dim] - grid_coords[dim][0])
-
-            next_dots = []
-            while dots:
-                next_dots.append(lerp(s, dots.pop(0), dots.pop(0)))
-
-            dots = next_dots
-
-        return dots[0] * self.scale_factor
+        dots = np.einsum("pcd,pcd->pc", self.gradients[indices], offsets[:, np.newaxis, :] - self.corners)
 
-    def __call__(self, *point) -> float:
-        """
-        Get the value of this Perlin noise function at the given point.
+        # Interpolate all those dot products together, with smoothstep to smooth out the slope as you pass
+        # from one grid cell into the next.  Adjacent pairs of corners differ in the last dimension, so
+        # interpolating them collapses it; the pairs then differ in the second-to-last, and so forth.
+        for axis in reversed(range(self.dimension)):
+            s = smoothstep(offsets[:, axis, np.newaxis])
+            dots = lerp(s, dots[:, 0::2], dots[:, 1::2])
 
-        The number of values given should match the number of dimensions.
-        """
-        ret = 0
+        return dots[:, 0] * self.scale_factor
+
+    def __call__(self, points: ArrayLike) -> np.ndarray:
+        """Get the value of this Perlin noise function at each of `points`."""
+        points = self._points(points)
+        ret = np.zeros(len(points))
         for o in range(self.octaves):
             o2 = 1 << o
-            new_point = []
-            for i, coord in enumerate(point):
-                coord *= o2
-                if self.tile[i]:
-                    coord %= self.tile[i] * o2
-                new_point.append(coord)
-            ret += self.get_plain_noise(*new_point) / o2
+            octave_points = points * o2
+            octave_points = np.where(self.tile, octave_points % np.maximum(self.tile * o2, 1), octave_points)
+            ret += self.plain_noise(octave_points) / o2
 
         # Need to scale n back down since adding all those extra octaves has
         # probably expanded it beyond ±1
@@ -278,6 +273,45 @@ class PerlinNoiseFactory:
         return ret
 
 
+class PerlinNoiseFactory:
+    """
+    Callable that produces Perlin noise for an arbitrary point in an arbitrary number of dimensions.
+
+    This evaluates one point at a time with a `PerlinNoise`, which is faster to use directly for many points.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        octaves: int = 1,
+        tile: tuple[int, ...] = (),
+        unbias: bool = False,
+        seed: int | None = None,
+    ):
+        """Create a new Perlin noise factory in the given number of dimensions, as described by `PerlinNoise`."""
+        self.noise = PerlinNoise(dimension, octaves, tile, unbias, seed)
+        self.dimension = dimension
+
+    def _point(self, point: tuple[float, ...]) -> list[tuple[float, ...]]:
+        if len(point) != self.dimension:
+            raise ValueError(
+                f"Expected {self.dimension} values, got {len(point)}"
+            )
+        return [point]
+
+    def get_plain_noise(self, *point) -> float:
+        """Get plain noise for a single point, without taking into account either octaves or tiling."""
+        return float(self.noise.plain_noise(self._point(point))[0])
+
+    def __call__(self, *point) -> float:
+        """
+        Get the value of this Perlin noise function at the given point.
+
+        The number of values given should match the number of dimensions.
+        """
+        return float(self.noise(self._point(point))[0])
+
+
 def create_snek_frame(
         perlin_factory: PerlinNoiseFactory, perlin_lookup_vertical_shift: float = 0,
         image_dimensions: tuple[int, int] = DEFAULT_IMAGE_DIMENSIONS,
@@ -298,10 +332,10 @@ def create_snek_frame(
     start_y = random.randint(image_margins[Y], image_dimensions[Y] - image_margins[Y])
     points: list[tuple[float, float]] = [(start_x, start_y)]
 
-    for index in range(snake_length):
-        angle = perlin_factory.get_plain_noise(
-            ((1 / (snake_length + 1)) * (index + 1)) + perlin_lookup_vertical_shift
-        ) * ANGLE_RANGE
+    angles = perlin_factory.noise.plain_noise(
+        np.arange(1, snake_length + 1) / (snake_length + 1) + perlin_lookup_vertical_shift
+    ) * ANGLE_RANGE
+    for index, angle in enumerate(angles):
         current_point = points[index]
         segment_length = random.randint(segment_length_range[0], segment_length_range[1])
         points.append((
@@ -309,49 +343,121 @@ def create_snek_frame(
             current_point[Y] + segment_length * math.sin(angle)
         ))
 
-    # normalize bounds
-    min_dimensions: list[float] = [start_x, start_y]
-    max_dimensions: list[float] = [start_x, start_y]
-    for point in points:
-        min_dimensions[X] = min(point[X], min_dimensions[X])
-        min_dimensions[Y] = min(point[Y], min_dimensions[Y])
-        max_dimensions[X] = max(point[X], max_dimensions[X])
-        max_dimensions[Y] = max(point[Y], max_dimensions[Y])
-
-    # shift towards middle
-    dimension_range = (max_dimensions[X] - min_dimensions[X], max_dimensions[Y] - min_dimensions[Y])
-    shift = (
-        image_dimensions[X] / 2 - (dimension_range[X] / 2 + min_dimensions[X]),
-        image_dimensions[Y] / 2 - (dimension_range[Y] / 2 + min_dimensions[Y])
-    )
-
     image = Image.new(mode="RGB", size=image_dimensions, color=bg_color)
+    path = center_path(np.array(points), image_dimensions)
+    _draw_snek(image, path, snake_color, snake_width, text, text_position, text_color)
+    return image
+
+
+def center_path(path: np.ndarray, image_dimensions: tuple[int, int]) -> np.ndarray:
+    """Shifts the points of a snek, or of each frame of one, so its bounds are centred in the image."""
+    min_dimensions = path.min(axis=-2, keepdims=True)
+    max_dimensions = path.max(axis=-2, keepdims=True)
+    return path + np.array(image_dimensions) / 2 - (min_dimensions + max_dimensions) / 2
+
+
+def _draw_snek(
+        image: Image.Image, path: np.ndarray, snake_color: int, snake_width: int,
+        text: str | None, text_position: tuple[float, float], text_color: int
+) -> None:
+    """Draws the snek along `path` onto `image`, with `text` if it's given."""
     draw = ImageDraw(image)
-    for index in range(1, len(points)):
-        point = points[index]
-        previous = points[index - 1]
-        draw.line(
-            (
-                shift[X] + previous[X],
-                shift[Y] + previous[Y],
-                shift[X] + point[X],
-                shift[Y] + point[Y]
-            ),
-            width=snake_width,
-            fill=snake_color
-        )
+    for previous, point in pairwise(path.tolist()):
+        draw.line((*previous, *point), width=snake_width, fill=snake_color)
     if text is not None:
         draw.multiline_text(text_position, text, fill=text_color)
-    del draw
-    return image
 
 
-def frame_to_png_bytes(image: Image) -> io.BytesIO:
-    """Convert image to byte stream."""
-    stream = io.BytesIO()
-    image.save(stream, format="PNG")
-    stream.seek(0)
-    return stream
+def snek_animation_paths(
+        noise: PerlinNoise, segment_lengths: np.ndarray, frames: int,
+        image_dimensions: tuple[int, int] = DEFAULT_IMAGE_DIMENSIONS
+) -> np.ndarray:
+    """
+    Returns the path of a snek slithering in a loop, as an array of points for each frame.
+
+    The angle of each segment is looked up in 3D noise, along the snek in the first dimension and around a
+    circle in the other two, so the last frame leads back into the first. The noise of every frame is
+    computed in a single call.
+    """
+    along = np.arange(1, len(segment_lengths) + 1) / (len(segment_lengths) + 1)
+    loop = np.linspace(0, 2 * math.pi, frames, endpoint=False)
+    lookups = np.stack(np.broadcast_arrays(
+        along[np.newaxis, :],
+        SNEK_LOOP_RADIUS * np.cos(loop)[:, np.newaxis],
+        SNEK_LOOP_RADIUS * np.sin(loop)[:, np.newaxis],
+    ), axis=-1)
+    angles = noise.plain_noise(lookups.reshape(-1, 3)).reshape(frames, len(segment_lengths)) * ANGLE_RANGE
+
+    steps = segment_lengths[:, np.newaxis] * np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+    path = np.concatenate((np.zeros((frames, 1, 2)), np.cumsum(steps, axis=1)), axis=1)
+    return center_path(path, image_dimensions)
+
+
+def render_snek_frames(
+        paths: np.ndarray, image_dimensions: tuple[int, int], duration: int,
+        snake_color: int, bg_color: int, snake_width: int,
+        text: str | None, text_position: tuple[float, float], text_color: int
+) -> bytes:
+    """
+    Draws a snek for each of `paths`, returning the frames as a GIF.
+
+    Frames are drawn straight onto a palette of the snek's three colours, so they needn't be quantized.
+    """
+    palette = Image.new("RGB", (3, 1))
+    for index, colour in enumerate((bg_color, snake_color, text_color)):
+        palette.paste(colour, (index, 0, index + 1, 1))
+
+    frames = []
+    for path in paths:
+        frame = Image.new("P", image_dimensions, 0)
+        frame.putpalette(palette.tobytes())
+        _draw_snek(frame, path, 1, snake_width, text, text_position, 2)
+        frames.append(frame)
+
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=duration)
+    return buffer.getvalue()
+
+
+async def create_snek_animation(
+        render: RenderService, paths: np.ndarray,
+        image_dimensions: tuple[int, int] = DEFAULT_IMAGE_DIMENSIONS,
+        snake_color: int = DEFAULT_SNAKE_COLOR, bg_color: int = DEFAULT_BACKGROUND_COLOR,
+        snake_width: int = DEFAULT_SNAKE_WIDTH, text: str = DEFAULT_TEXT,
+        text_position: tuple[float, float] = DEFAULT_TEXT_POSITION, text_color: int = DEFAULT_TEXT_COLOR
+) -> bytes:
+    """
+    Renders a looping GIF of a snek following `paths`, one per frame, in the render service.
+
+    Chunks of frames are rendered in parallel, one batch of chunks per worker at a time. Once the rendered
+    chunks reach `MAX_SNEK_ANIMATION_BYTES`, the rest are dropped, so the animation ends early.
+    """
+    style = (snake_color, bg_color, snake_width, text, text_position, text_color)
+    chunks = [paths[start:start + SNEK_FRAMES_PER_CHUNK] for start in range(0, len(paths), SNEK_FRAMES_PER_CHUNK)]
+
+    rendered = []
+    size = 0
+    for start in range(0, len(chunks), render.max_workers):
+        for gif in await asyncio.gather(*(
+            render.run(render_snek_frames, chunk, image_dimensions, SNEK_FRAME_DURATION, *style)
+            for chunk in chunks[start:start + render.max_workers]
+        )):
+            if rendered and size + len(gif) > MAX_SNEK_ANIMATION_BYTES:
+                log.info(f"Snek animation reached {size:,} bytes, dropping its remaining frames.")
+                return splice_gifs(rendered)
+            rendered.append(gif)
+            size += len(gif)
+    return splice_gifs(rendered)
+
+
+async def frame_to_file(render: RenderService, image: Image, filename: str) -> File:
+    """
+    Encode image in the format best suited to it, as a file named `filename` with a matching extension.
+
+    Trying out several formats takes a while, so it's done in the render service.
+    """
+    encoded = await render.run(encode_image, image)
+    return encoded.to_file(filename)
 
 
 log = get_logger(__name__)
@@ -576,7 +682,7 @@ class SnakeAndLaddersGame:
             board_img.paste(self.avatar_images[player.id],
                             box=(x_offset, y_offset))
 
-        board_file = File(frame_to_png_bytes(board_img), filename="Board.jpg")
+        board_file = await frame_to_file(self.snakes.bot.render, board_img, "Board.png")
         player_list = "\n".join((user.mention + ": Tile " + str(self.player_tiles[user.id])) for user in self.players)
 
         # Store and send new messages
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from functools import partial
+from typing import Any
+
+from async_rediscache import RedisSession
+from pydis_core.utils import scheduling
+from pydis_core.utils.logging import get_logger
+from redis import RedisError
+
+from bot.utils.cache import SingleFlight
+
+log = get_logger(__name__)
+
+# Articles are refetched once this old; until they're this much older, they're still served while refetching
+FRESH_SECONDS = 7 * 24 * 60 * 60
+STALE_SECONDS = 30 * 24 * 60 * 60
+PREWARM_CONCURRENCY = 4
+
+SnakeInfo = dict[str, Any] | None
+
+
+class SnakeInfoCache:
+    """
+    Snake information parsed from Wikipedia, persisted in Redis.
+
+    Entries are fresh for `fresh_seconds` after being fetched. Stale entries are served for up to
+    `stale_seconds` more while they're refetched in the background, after which Redis expires them. Concurrent
+    lookups of the same snake share one fetch. Snakes Wikipedia has no article for are cached as None, but
+    failed fetches aren't cached. If Redis is unavailable, every lookup is fetched.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[SnakeInfo]],
+        redis_session: RedisSession | None = None,
+        *,
+        fresh_seconds: float = FRESH_SECONDS,
+        stale_seconds: float = STALE_SECONDS,
+    ):
+        self._fetch = fetch
+        self._redis_session = redis_session
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+
+        self._lookups = SingleFlight()
+        self._refreshes = SingleFlight()
+
+    @property
+    def redis_session(self) -> RedisSession:
+        """The session entries are stored in; the bot's session unless another one was given."""
+        return self._redis_session or RedisSession.get_current_session()
+
+    def _key(self, name: str) -> str:
+        global_namespace = self.redis_session.global_namespace
+        namespace = f"{global_namespace}.Snakes.info" if global_namespace else "Snakes.info"
+        return f"{namespace}:{name.lower()}"
+
+    async def get(self, name: str) -> SnakeInfo:
+        """Return the information about the snake called `name`, fetching it if it isn't cached."""
+        return await self._lookups.run(name.lower(), partial(self._lookup, name))
+
+    async def _lookup(self, name: str) -> SnakeInfo:
+        try:
+            entry = await self.redis_session.client.get(self._key(name))
+        except RedisError:
+            log.warning(f"Couldn't read the cached information about {name!r}, fetching it.", exc_info=True)
+            return await self._fetch(name)
+
+        if entry is None:
+            info, _ = await self._refresh(name)
+            return info
+
+        entry = json.loads(entry)
+        if time.time() - entry["fetched"] >= self.fresh_seconds:
+            scheduling.create_task(self._refresh_in_background(name))
+        return entry["info"]
+
+    async def _refresh(self, name: str) -> tuple[SnakeInfo, bool]:
+        """
+        Fetch the information about a snake and cache it, unless fetching it failed.
+
+        Returns the information, and whether it was cached.
+        """
+        return await self._refreshes.run(name.lower(), partial(self._fetch_and_store, name))
+
+    async def _refresh_in_background(self, name: str) -> None:
+        try:
+            await self._refresh(name)
+        except Exception:
+            log.exception(f"Couldn't refresh the stale information about {name!r}.")
+
+    async def _fetch_and_store(self, name: str) -> tuple[SnakeInfo, bool]:
+        info = await self._fetch(name)
+        if info is not None and info.get("error"):
+            return info, False
+
+        entry = json.dumps({"fetched": time.time(), "info": info})
+        try:
+            await self.redis_session.client.set(
+                self._key(name), entry, ex=int(self.fresh_seconds + self.stale_seconds)
+            )
+        except RedisError:
+            log.warning(f"Couldn't cache the information about {name!r}.", exc_info=True)
+            return info, False
+        return info, True
+
+    async def prewarm(self, names: Iterable[str], *, concurrency: int = PREWARM_CONCURRENCY) -> int:
+        """
+        Make sure every one of `names` is cached, fetching at most `concurrency` at once.
+
+        Returns the number of snakes that were fetched and cached; those that were already fresh are left as they
+        are, and those that couldn't be fetched aren't counted.
+        """
+        # Entries are keyed case insensitively, but fetched with the spelling they were asked for, as `get` does
+        spellings = {}
+        for name in names:
+            spellings.setdefault(name.lower(), name)
+        names = list(spellings.values())
+        try:
+            async with self.redis_session.client.pipeline(transaction=False) as pipe:
+                for name in names:
+                    pipe.get(self._key(name))
+                entries = await pipe.execute()
+        except RedisError:
+            log.warning("Couldn't read the cached snake information to prewarm it.", exc_info=True)
+            return 0
+
+        now = time.time()
+        missing = [
+            name for name, entry in zip(names, entries, strict=True)
+            if entry is None or now - json.loads(entry)["fetched"] >= self.fresh_seconds
+        ]
+        slots = asyncio.Semaphore(concurrency)
+
+        async def refresh(name: str) -> bool:
+            async with slots:
+                try:
+                    _, stored = await self._refresh(name)
+                except Exception:
+                    log.exception(f"Couldn't prewarm the information about {name!r}.")
+                    return False
+                return stored
+
+        return sum(await asyncio.gather(*map(refresh, missing)))
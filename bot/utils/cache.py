@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from pathlib import Path
+from typing import Any, TypeVar
+
+from pydis_core.utils.logging import get_logger
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class ByteCache:
+    """
+    A least recently used cache of byte strings, bounded by their total size rather than their number.
+
+    When a `spill_dir` is given, entries evicted from memory are written there instead of being dropped, and
+    are read back and promoted to memory on their next hit. Spilled entries have their own size bound,
+    past which the least recently spilled ones are deleted. Spilled files are written, read and deleted in
+    worker threads, one at a time, so the disk never blocks the event loop. Keys must be hashable, and have a
+    stable `repr` if entries are spilled, since spilled files are named after a hash of it.
+    """
+
+    def __init__(self, max_bytes: int, *, spill_dir: Path | None = None, max_spill_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._spilled: OrderedDict[Hashable, int] = OrderedDict()
+        self._disk_lock = asyncio.Lock()
+        self.size = 0
+        self.spilled_size = 0
+        self.hits = 0
+        self.misses = 0
+
+        if spill_dir is not None:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._spilled)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries or key in self._spilled
+
+    def _spill_path(self, key: Hashable) -> Path:
+        return self.spill_dir / f"{hashlib.sha256(repr(key).encode()).hexdigest()}.bin"
+
+    async def get(self, key: Hashable) -> bytes | None:
+        """Return the value cached under `key`, or None if there isn't one."""
+        if (value := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        if key in self._spilled:
+            async with self._disk_lock:
+                # The entry may have been dropped while waiting for the disk.
+                if key in self._spilled:
+                    try:
+                        value = await asyncio.to_thread(self._spill_path(key).read_bytes)
+                    except OSError:
+                        log.warning(f"Couldn't read a spilled cache entry for {key!r}.", exc_info=True)
+                    await self._unspill(key)
+            if value is not None:
+                self.hits += 1
+                # A newer value may have been put while the spilled one was read.
+                if (current := self._entries.get(key)) is not None:
+                    return current
+                await self.put(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: Hashable, value: bytes) -> None:
+        """Cache `value` under `key`, evicting the least recently used entries to stay within the size bound."""
+        if len(value) > self.max_bytes:
+            return
+
+        if key in self._spilled:
+            await self.pop(key)
+        self._discard(key)
+        self._entries[key] = value
+        self.size += len(value)
+        evicted = []
+        while self.size > self.max_bytes:
+            evicted_key, evicted_value = self._entries.popitem(last=False)
+            self.size -= len(evicted_value)
+            evicted.append((evicted_key, evicted_value))
+
+        for evicted_key, evicted_value in evicted:
+            await self._spill(evicted_key, evicted_value)
+
+    def _discard(self, key: Hashable) -> None:
+        if (value := self._entries.pop(key, None)) is not None:
+            self.size -= len(value)
+
+    async def pop(self, key: Hashable) -> None:
+        """Remove the value cached under `key`, if there is one."""
+        self._discard(key)
+        if key in self._spilled:
+            async with self._disk_lock:
+                if key in self._spilled:
+                    await self._unspill(key)
+
+    async def clear(self) -> None:
+        """Remove every entry, including spilled ones."""
+        self._entries.clear()
+        self.size = 0
+        async with self._disk_lock:
+            for key in list(self._spilled):
+                await self._unspill(key)
+
+    async def _spill(self, key: Hashable, value: bytes) -> None:
+        if self.spill_dir is None or len(value) > self.max_spill_bytes:
+            return
+
+        async with self._disk_lock:
+            try:
+                await asyncio.to_thread(self._spill_path(key).write_bytes, value)
+            except OSError:
+                log.warning(f"Couldn't spill a cache entry for {key!r} to disk.", exc_info=True)
+                return
+            self.spilled_size += len(value) - self._spilled.pop(key, 0)
+            self._spilled[key] = len(value)
+
+            while self.spilled_size > self.max_spill_bytes:
+                await self._unspill(next(iter(self._spilled)))
+
+    async def _unspill(self, key: Hashable) -> None:
+        """Delete a spilled entry; the disk lock must be held."""
+        self.spilled_size -= self._spilled.pop(key)
+        await asyncio.to_thread(self._spill_path(key).unlink, missing_ok=True)
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, sharing its result with every concurrent caller.
+
+    Results are kept for `ttl` seconds after their call finishes, so that callers shortly after get them
+    without another call. At most `max_entries` results are kept, dropping the oldest first. Exceptions are
+    raised to every caller waiting on the call, but aren't kept. A caller being cancelled doesn't cancel the
+    call for the others.
+    """
+
+    def __init__(self, ttl: float = 0.0, *, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._results: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.calls = 0
+        self.hits = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pending or key in self._results
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of `func()` for `key`, joining a call in flight or using a fresh result if there is one."""
+        if (result := self._results.get(key)) is not None:
+            expiry, value = result
+            if expiry > time.monotonic():
+                self.hits += 1
+                return value
+            del self._results[key]
+
+        if (future := self._pending.get(key)) is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            future.add_done_callback(partial(self._finish, key))
+            self._pending[key] = future
+        else:
+            self.hits += 1
+        return await asyncio.shield(future)
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the result kept for `key`, so the next caller makes a new call."""
+        self._results.pop(key, None)
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        del self._pending[key]
+        # Retrieving the exception keeps it from being logged as unretrieved if every caller was cancelled.
+        if future.cancelled() or future.exception() is not None or self.ttl <= 0:
+            return
+
+        self._results[key] = (time.monotonic() + self.ttl, future.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
@@ -0,0 +1,102 @@
+import time
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+
+import discord
+from PIL import Image
+from pydis_core.async_stats import AsyncStatsClient
+from pydis_core.utils.logging import get_logger
+
+log = get_logger(__name__)
+
+# Encoded images above this size are re-encoded more aggressively, if there's time left to do so
+MAX_BYTES = 1024 * 1024
+MAX_SECONDS = 0.5
+# Images with at most this many colours are stored as palette PNGs, which is lossless for them
+PALETTE_COLOURS = 256
+
+# Formats to try for images with many colours, in order of preference; the first fitting the byte budget is used
+PHOTO_ENCODINGS = (
+    ("PNG", {"compress_level": 1}),
+    ("WEBP", {"quality": 90, "method": 4}),
+    ("WEBP", {"quality": 75, "method": 4}),
+    ("WEBP", {"quality": 60, "method": 4}),
+)
+# Likewise for palette images, which are small enough that a PNG only needs optimising if it's still too large
+PALETTE_ENCODINGS = (
+    ("PNG", {"compress_level": 6}),
+    ("PNG", {"optimize": True}),
+)
+
+EXTENSIONS = {b"\x89PNG": ".png", b"GIF8": ".gif", b"RIFF": ".webp"}
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedImage:
+    """An encoded image, with the settings it was encoded with."""
+
+    data: bytes
+    format: str
+    settings: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    attempts: int = 1
+
+    @property
+    def extension(self) -> str:
+        """The file extension of the image's format, including the leading dot."""
+        return file_extension(self.data)
+
+    def to_file(self, filename: str) -> discord.File:
+        """Wrap the image in a `discord.File`, replacing the extension of `filename` with the right one."""
+        return discord.File(BytesIO(self.data), filename=str(Path(filename).with_suffix(self.extension)))
+
+    def report(self, stats: AsyncStatsClient, name: str) -> None:
+        """Send the chosen format, the encoded size and the time spent encoding to statsd, under `name`."""
+        stats.incr(f"image_encoding.{name}.{self.format.lower()}")
+        stats.gauge(f"image_encoding.{name}.bytes", len(self.data))
+        stats.timing(f"image_encoding.{name}.time", self.seconds * 1000)
+
+
+def file_extension(data: bytes) -> str:
+    """Return the file extension of encoded image `data`, found from its magic number."""
+    return EXTENSIONS.get(data[:4], ".png")
+
+
+def _encode(image: Image.Image, format: str, settings: dict) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format, **settings)
+    return buffer.getvalue()
+
+
+def encode_image(image: Image.Image, *, max_bytes: int = MAX_BYTES, max_seconds: float = MAX_SECONDS) -> EncodedImage:
+    """
+    Encode `image` in the format best suited to it that fits within `max_bytes`.
+
+    Palette images, and images with few enough colours to become one, are stored as palette PNGs. Other images
+    go down `PHOTO_ENCODINGS`, from lossless PNG to increasingly lossy WebP. The first encoding that fits in
+    `max_bytes` is used; if encoding has taken `max_seconds` before then, the smallest result so far is used.
+    """
+    start = time.perf_counter()
+    if image.mode in ("1", "L", "P"):
+        encodings = PALETTE_ENCODINGS
+    elif image.mode == "RGB" and image.getcolors(PALETTE_COLOURS) is not None:
+        image = image.convert("P", palette=Image.Palette.ADAPTIVE, colors=PALETTE_COLOURS)
+        encodings = PALETTE_ENCODINGS
+    else:
+        encodings = PHOTO_ENCODINGS
+
+    best = None
+    attempts = 0
+    for format, settings in encodings:
+        data = _encode(image, format, settings)
+        attempts += 1
+        if best is None or len(data) < len(best[0]):
+            best = (data, format, settings)
+        if len(data) <= max_bytes or time.perf_counter() - start >= max_seconds:
+            break
+
+    data, format, settings = best
+    encoded = EncodedImage(data, format, settings, time.perf_counter() - start, attempts)
+    log.trace(f"Encoded a {image.mode} image as {len(data):,} bytes of {format} {settings} in {encoded.seconds:.3f}s.")
+    return encoded
@@ -19,3 +19,20 @@ class MovedCommandError(Exception):
 
     def __init__(self, new_command_name: str):
         self.new_command_name = new_command_name
+
+
+class RenderBusyError(Exception):
+    """Raised when the render service already has as many pending jobs as it accepts."""
+
+    def __init__(self, pending: int):
+        super().__init__(f"The render service has {pending} pending jobs.")
+        self.pending = pending
+
+
+class RenderTimeoutError(TimeoutError):
+    """Raised when a render job doesn't finish in time."""
+
+    def __init__(self, job: str, timeout: float):
+        super().__init__(f"Render job {job} didn't finish within {timeout} seconds.")
+        self.job = job
+        self.timeout = timeout
@@ -0,0 +1,63 @@
+"""
+Joining GIFs at the byte level, so that animations rendered in chunks needn't be decoded to be combined.
+
+See https://www.w3.org/Graphics/GIF/spec-gif89a.txt for the format.
+"""
+
+
+def _sub_blocks_end(gif: bytes, position: int) -> int:
+    """Returns the position following the data sub-blocks starting at `position`."""
+    while length := gif[position]:
+        position += length + 1
+    return position + 1
+
+
+def _frames(gif: bytes) -> bytearray:
+    """Returns the frames of a GIF, i.e. its images and their graphic control extensions, with local colour tables."""
+    flags = gif[10]
+    position = 13
+    global_table = b""
+    if flags & 0x80:
+        table_size = 3 << ((flags & 0x07) + 1)
+        global_table = gif[position:position + table_size]
+        position += table_size
+
+    frames = bytearray()
+    while (block := gif[position]) != 0x3B:
+        if block == 0x21:
+            end = _sub_blocks_end(gif, position + 2)
+            if gif[position + 1] == 0xF9:
+                frames += gif[position:end]
+            position = end
+        elif block == 0x2C:
+            descriptor = bytearray(gif[position:position + 10])
+            position += 10
+            if descriptor[9] & 0x80:
+                table_size = 3 << ((descriptor[9] & 0x07) + 1)
+                local_table = gif[position:position + table_size]
+                position += table_size
+            else:
+                # Move the global colour table into the frame, since another chunk's will be global.
+                descriptor[9] = descriptor[9] & 0x78 | flags & 0x87
+                local_table = global_table
+            end = _sub_blocks_end(gif, position + 1)
+            frames += descriptor + local_table + gif[position:end]
+            position = end
+        else:
+            raise ValueError(f"Unexpected GIF block {block:#04x} at {position}.")
+    return frames
+
+
+def splice_gifs(gifs: list[bytes]) -> bytes:
+    """Joins GIFs of the same size into one looping GIF, without decoding them."""
+    screen = bytearray(gifs[0][6:13])
+    # Keep the colour resolution, but drop the global colour table and its background colour.
+    screen[4] &= 0x70
+    screen[5] = 0
+
+    spliced = bytearray(b"GIF89a" + screen)
+    spliced += b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+    for gif in gifs:
+        spliced += _frames(gif)
+    spliced += b"\x3b"
+    return bytes(spliced)
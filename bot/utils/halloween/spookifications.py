@@ -1,3 +1,6 @@
+from collections.abc import Callable
+from functools import cache, lru_cache
+from pathlib import Path
 from random import choice, randint
 
 from PIL import Image, ImageOps
@@ -5,6 +8,75 @@ from pydis_core.utils.logging import get_logger
 
 log = get_logger()
 
+OVERLAYS_DIRECTORY = Path("bot/resources/holidays/halloween")
+OVERLAYS = {
+    "pentagram": "bloody-pentagram.png",
+    "bat": "bat-clipart.png",
+}
+# Overlays are resized to the size of the image, or a random fraction of it, so few sizes are ever used
+OVERLAY_CACHE_SIZE = 64
+
+
+@cache
+def _overlay_source(name: str) -> Image.Image:
+    """Returns the overlay called `name` at its original size."""
+    overlay = Image.open(OVERLAYS_DIRECTORY / OVERLAYS[name])
+    overlay.load()
+    return overlay
+
+
+@lru_cache(OVERLAY_CACHE_SIZE)
+def overlay(name: str, size: tuple[int, int]) -> Image.Image:
+    """
+    Returns the overlay called `name` resized to `size`.
+
+    The overlay is cached, and shared between callers, so it mustn't be modified.
+    """
+    return _overlay_source(name).resize(size)
+
+
+def _invert(im: Image.Image) -> Image.Image:
+    return ImageOps.invert(im)
+
+
+def _paste_pentagram(im: Image.Image) -> Image.Image:
+    penta = overlay("pentagram", im.size)
+    im.paste(penta, (0, 0), penta)
+    return im
+
+
+def _paste_bats(im: Image.Image) -> Image.Image:
+    wt, _ = im.size
+    bat_size = randint(wt//10, wt//7)
+    rot = randint(0, 90)
+    bat = overlay("bat", (bat_size, bat_size)).rotate(rot)
+    x = randint(wt-(bat_size * 3), wt-bat_size)
+    y = randint(10, bat_size)
+    im.paste(bat, (x, y), bat)
+    im.paste(bat, (x + bat_size, y + (bat_size // 4)), bat)
+    im.paste(bat, (x - bat_size, y - (bat_size // 2)), bat)
+    return im
+
+
+# Steps of the spook effects, which take and return RGB images, pasting onto them in place where they can
+EFFECTS: dict[str, Callable[[Image.Image], Image.Image]] = {
+    "inversion": _invert,
+    "pentagram": _paste_pentagram,
+    "bat": _paste_bats,
+}
+
+
+def spookify(im: Image.Image, *effects: str) -> Image.Image:
+    """
+    Applies each of the named spook effects to the image, in order.
+
+    The image is converted to RGB once, and the effects then paste their overlays onto it in place.
+    """
+    im = im.convert("RGB")
+    for effect in effects:
+        im = EFFECTS[effect](im)
+    return im
+
 
 def inversion(im: Image.Image) -> Image.Image:
     """
@@ -12,19 +84,12 @@ def inversion(im: Image.Image) -> Image.Image:
 
     Returns an inverted image when supplied with an Image object.
     """
-    im = im.convert("RGB")
-    inv = ImageOps.invert(im)
-    return inv
+    return spookify(im, "inversion")
 
 
 def pentagram(im: Image.Image) -> Image.Image:
     """Adds pentagram to the image."""
-    im = im.convert("RGB")
-    wt, ht = im.size
-    penta = Image.open("bot/resources/holidays/halloween/bloody-pentagram.png")
-    penta = penta.resize((wt, ht))
-    im.paste(penta, (0, 0), penta)
-    return im
+    return spookify(im, "pentagram")
 
 
 def bat(im: Image.Image) -> Image.Image:
@@ -34,24 +99,11 @@ def bat(im: Image.Image) -> Image.Image:
     The bat silhouette is of a size at least one-fifths that of the original image and may be rotated
     up to 90 degrees anti-clockwise.
     """
-    im = im.convert("RGB")
-    wt, _ = im.size
-    bat = Image.open("bot/resources/holidays/halloween/bat-clipart.png")
-    bat_size = randint(wt//10, wt//7)
-    rot = randint(0, 90)
-    bat = bat.resize((bat_size, bat_size))
-    bat = bat.rotate(rot)
-    x = randint(wt-(bat_size * 3), wt-bat_size)
-    y = randint(10, bat_size)
-    im.paste(bat, (x, y), bat)
-    im.paste(bat, (x + bat_size, y + (bat_size // 4)), bat)
-    im.paste(bat, (x - bat_size, y - (bat_size // 2)), bat)
-    return im
+    return spookify(im, "bat")
 
 
 def get_random_effect(im: Image.Image) -> Image.Image:
     """Randomly selects and applies an effect."""
-    effects = [inversion, pentagram, bat]
-    effect = choice(effects)
-    log.info("Spookyavatar's chosen effect: " + effect.__name__)
-    return effect(im)
+    effect = choice(list(EFFECTS))
+    log.info("Spookyavatar's chosen effect: " + effect)
+    return spookify(im, effect)
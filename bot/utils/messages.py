@@ -1,10 +1,13 @@
+import asyncio
 import contextlib
 import re
 from collections.abc import Callable
+from typing import Any
 
-from discord import Embed, Message
+from discord import Embed, HTTPException, Message, NotFound
 from discord.ext import commands
 from discord.ext.commands import Context, MessageConverter
+from pydis_core.utils import scheduling
 from pydis_core.utils.logging import get_logger
 
 log = get_logger(__name__)
@@ -84,3 +87,65 @@ def convert_embed(func: Callable[[str, ], str], embed: Embed) -> Embed:
             field["value"] = func(field.get("value", ""))
 
     return Embed.from_dict(embed_dict)
+
+
+class MessageUpdater:
+    """
+    Coalesces rapid edits to a message into as few Discord API calls as possible.
+
+    Calls to `update` merge their keyword arguments into one pending edit, which is sent once `delay`
+    seconds have passed and at least `interval` seconds after the previous edit. Updates arriving while
+    an edit is in flight (including while discord.py is backing off a 429) are merged into the next one,
+    so the message always ends up showing the latest state.
+    """
+
+    def __init__(self, message: Message, *, delay: float = 0.25, interval: float = 1.0):
+        self.message = message
+        self.delay = delay
+        self.interval = interval
+
+        self.edits_sent = 0
+        self.updates_coalesced = 0
+
+        self._pending: dict[str, Any] = {}
+        self._last_edit = float("-inf")
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def update(self, **fields: Any) -> None:
+        """Schedule an edit of the message with `fields`, which are passed to `Message.edit`."""
+        if self._pending:
+            self.updates_coalesced += 1
+        self._pending.update(fields)
+
+        if self._task is None or self._task.done():
+            self._task = scheduling.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Send any pending edit immediately and wait until it has been applied."""
+        if self._task is None or self._task.done():
+            return
+        self._wake.set()
+        await self._task
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            send_at = max(loop.time() + self.delay, self._last_edit + self.interval)
+            if not self._wake.is_set():
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), timeout=send_at - loop.time())
+
+            fields, self._pending = self._pending, {}
+            try:
+                await self.message.edit(**fields)
+            except NotFound:
+                log.debug(f"Message {self.message.id} was deleted, dropping its pending edits.")
+                self._pending.clear()
+            except HTTPException as e:
+                log.warning(f"Failed to edit message {self.message.id}: {e}")
+            else:
+                self.edits_sent += 1
+            self._last_edit = loop.time()
+
+        self._wake.clear()
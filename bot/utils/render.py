@@ -0,0 +1,154 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import TypeVar
+
+from pydis_core.utils.logging import get_logger
+
+from bot.utils.exceptions import RenderBusyError, RenderTimeoutError
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class RenderService:
+    """
+    Runs CPU bound work, such as drawing images with Pillow, in a pool of worker processes shared by every cog.
+
+    Unlike threads, worker processes don't contend for the GIL, so pure Python pixel loops run in parallel
+    and don't stall the event loop. Jobs are pickled across the process boundary: they must be module level
+    functions or static methods, taking and returning picklable values, such as PNG bytes rather than open
+    files or `discord.File`s.
+
+    At most `max_pending` jobs may be queued or running at once; further jobs are refused with
+    `RenderBusyError` rather than piling up behind a saturated pool. A job that doesn't finish within its
+    timeout raises `RenderTimeoutError`; it's dropped if it hasn't started, otherwise its worker stays busy
+    until it completes, and it keeps counting towards `max_pending` until then. If a worker dies, e.g. from
+    running out of memory, the pool is replaced, and the jobs it lost are refused with `RenderBusyError`.
+
+    Background jobs, such as batches of renders, go in a separate lane: they wait for one of
+    `max_workers - 1` slots, and for fewer than `max_pending` jobs to be pending, instead of being refused, so
+    they never take up every worker, and commands always have one to run on.
+    """
+
+    def __init__(self, max_workers: int | None = None, *, max_pending: int = 32, timeout: float = 30.0):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._background_slots = asyncio.Semaphore(max(1, self.max_workers - 1))
+        self._job_finished = asyncio.Event()
+        self._pending = 0
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs queued or running."""
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Workers are started on first use, and spawned rather than forked so they don't inherit the
+        # event loop, open sockets, or locks held by other threads at the time of the fork.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _release(self, background: bool, _: Future) -> None:
+        self._pending -= 1
+        self._job_finished.set()
+        if background:
+            self._background_slots.release()
+
+    def _release_soon(self, loop: asyncio.AbstractEventLoop, background: bool, job: Future) -> None:
+        """Release a finished job's place from the pool's thread, unless its loop has closed in the meantime."""
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._release, background, job)
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Shut down a broken pool, so the next job gets a fresh one, unless it has already been replaced."""
+        if self._executor is executor:
+            log.warning("The render pool broke, restarting it.")
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, func: Callable[..., T], *args) -> tuple[ProcessPoolExecutor, Future]:
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(func, *args)
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args,
+        timeout: float | None = None,
+        background: bool = False,
+    ) -> T:
+        """
+        Run `func(*args)` in a worker process and return its result, waiting at most `timeout` seconds.
+
+        If `background` is set, the job first waits for a background slot and for room under `max_pending`,
+        and the timeout only starts once it has both.
+        """
+        if background:
+            await self._background_slots.acquire()
+        try:
+            while background and self._pending >= self.max_pending and not self._closed:
+                self._job_finished.clear()
+                await self._job_finished.wait()
+            if self._closed:
+                raise RuntimeError("The render service has been shut down.")
+            if not background and self._pending >= self.max_pending:
+                raise RenderBusyError(self._pending)
+
+            log.trace(f"Rendering {func.__name__} in a worker process.")
+            executor, job = self._submit(func, *args)
+        except BaseException:
+            if background:
+                self._background_slots.release()
+            raise
+
+        # The slot is held until the job ends, rather than until it times out, so it can't run over its lane.
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        job.add_done_callback(partial(self._release_soon, loop, background))
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+        except TimeoutError:
+            raise RenderTimeoutError(func.__name__, timeout) from None
+        except BrokenProcessPool:
+            # The job was lost with the pool's workers; it can be tried again once the pool is replaced.
+            log.warning(f"Render job {func.__name__} was lost when the render pool broke.")
+            self._restart(executor)
+            raise RenderBusyError(self._pending) from None
+
+    async def shutdown(self) -> None:
+        """Stop accepting jobs, drop queued ones, and give running ones up to the default timeout to finish."""
+        self._closed = True
+        self._job_finished.set()
+        if self._executor is None:
+            return
+
+        executor, self._executor = self._executor, None
+        # Executors have no public way to terminate their workers, so they're noted before it forgets them.
+        workers = list(executor._processes.values())
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)),
+                self.timeout,
+            )
+        except TimeoutError:
+            log.warning(f"Render jobs still running after {self.timeout} seconds, terminating the workers.")
+            for process in workers:
+                process.terminate()
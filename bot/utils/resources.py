@@ -0,0 +1,57 @@
+import asyncio
+from collections.abc import Callable
+from pathlib import Path
+from typing import Generic, TypeVar
+
+from pydis_core.utils.logging import get_logger
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Resolved from this file rather than the working directory, so resources load wherever the bot is started from.
+RESOURCES_PATH = Path(__file__).resolve().parent.parent / "resources"
+
+
+def resource_path(*parts: str) -> Path:
+    """Return the absolute path of a file inside `bot/resources`."""
+    return RESOURCES_PATH.joinpath(*parts)
+
+
+class LazyResource(Generic[T]):
+    """
+    A resource that is loaded on first use and cached afterwards.
+
+    `load` runs in a worker thread so parsing never blocks the event loop. Concurrent callers of `get`
+    share one load, and a failed load is retried by the next caller.
+    """
+
+    def __init__(self, load: Callable[[], T], name: str | None = None):
+        self._load = load
+        self.name = name or getattr(load, "__qualname__", repr(load))
+        self._task: asyncio.Task[T] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the resource has been loaded successfully."""
+        task = self._task
+        return task is not None and task.done() and not task.cancelled() and task.exception() is None
+
+    async def get(self) -> T:
+        """Return the resource, loading it first if needed."""
+        if self._task is None:
+            log.debug(f"Loading resource {self.name}.")
+            self._task = asyncio.create_task(asyncio.to_thread(self._load))
+
+        task = self._task
+        try:
+            # Shielded so a cancelled caller doesn't cancel the load shared with everyone else.
+            return await asyncio.shield(task)
+        except Exception:
+            if self._task is task and task.done():
+                self._task = None
+            raise
+
+    def reset(self) -> None:
+        """Drop the cached value so the next `get` loads the resource again."""
+        self._task = None
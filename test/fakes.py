@@ -0,0 +1,78 @@
+"""Stand-ins for Discord models and the Redis session, shared by the tests and the benchmarks."""
+import itertools
+from collections import Counter
+
+import fakeredis.aioredis
+from discord import Embed
+
+_ids = itertools.count(1)
+
+
+class FakeUser:
+    """A user or member; like discord models, it is identified by its id."""
+
+    __slots__ = ("id",)
+
+    def __init__(self):
+        self.id = next(_ids)
+
+
+class FakeMessage:
+    """A message that records how many times it has been edited."""
+
+    __slots__ = ("author", "channel", "content", "edits", "embed", "id")
+
+    def __init__(self, channel: "FakeChannel", author: FakeUser, content: str = "", embed: Embed | None = None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.embed = embed
+        self.edits = 0
+
+    async def edit(self, *, embed: Embed | None = None, **_) -> None:
+        """Apply an edit, without any network round trip."""
+        self.embed = embed
+        self.edits += 1
+
+
+class FakeChannel:
+    """A text channel that counts the titles of the embeds sent to it."""
+
+    __slots__ = ("id", "titles")
+
+    def __init__(self, titles: Counter):
+        self.id = next(_ids)
+        self.titles = titles
+
+    async def send(self, content: str = "", *, embed: Embed | None = None, **_) -> FakeMessage:
+        """Send a message as the bot."""
+        if embed is not None and embed.title:
+            self.titles[embed.title] += 1
+        return FakeMessage(self, BOT_USER, content, embed)
+
+
+class FakeContext:
+    """The parts of `commands.Context` the Hangman command uses."""
+
+    __slots__ = ("author", "channel")
+
+    def __init__(self, channel: FakeChannel, author: FakeUser):
+        self.channel = channel
+        self.author = author
+
+    async def send(self, content: str = "", **kwargs) -> FakeMessage:
+        """Send a message to the invoking channel."""
+        return await self.channel.send(content, **kwargs)
+
+
+BOT_USER = FakeUser()
+
+
+class FakeRedisSession:
+    """A Redis session backed by fakeredis, so game results are written like they would be in production."""
+
+    global_namespace = "bot"
+
+    def __init__(self):
+        self.client = fakeredis.aioredis.FakeRedis(decode_responses=True)
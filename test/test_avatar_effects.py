@@ -0,0 +1,86 @@
+import random
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from benchmarks.easterify import legacy_easterify, vectorised_easterify
+from benchmarks.mosaic import legacy_mosaic, tiles
+from benchmarks.spookify import COMPARISONS
+from bot.exts.avatar_modification._animation import frame_durations, render_chunks, sample_frames
+from bot.exts.avatar_modification._effects import PRIDE_FLAGS_DIRECTORY, PfpEffects
+from bot.utils.gif import splice_gifs
+from bot.utils.halloween.spookifications import overlay
+
+
+def test_easterify_matches_per_pixel_implementation() -> None:
+    """Test that the vectorised easterify effect recolours every pixel like the per-pixel implementation did."""
+    rng = np.random.default_rng(11)
+    avatar = Image.fromarray(rng.integers(0, 256, (64, 64, 4), dtype=np.uint8), "RGBA")
+    assert vectorised_easterify(avatar.copy()).tobytes() == legacy_easterify(avatar.copy()).tobytes()
+
+
+def test_pridify_matches_uncached_rings() -> None:
+    """Test that pride avatars built from the cached flag rings match ones drawn from scratch."""
+    rng = np.random.default_rng(14)
+    avatar = Image.fromarray(rng.integers(0, 256, (1024, 1024, 4), dtype=np.uint8), "RGBA")
+    for flag, pixels in (("gay", 64), ("transgender", 0), ("asexual", 512), ("gay", 64)):
+        expected = PfpEffects.crop_avatar_circle(avatar.copy())
+        ring = Image.open(PRIDE_FLAGS_DIRECTORY / f"{flag}.png").resize((1024, 1024)).convert("RGBA")
+        expected.alpha_composite(PfpEffects.crop_ring(ring, pixels))
+
+        assert PfpEffects.pridify_effect(avatar.copy(), pixels, flag).tobytes() == expected.tobytes()
+
+
+def test_mosaic_shuffles_whole_tiles() -> None:
+    """Test that the mosaic is made of the same tiles as the crop and paste implementation, trimmed the same way."""
+    rng = np.random.default_rng(15)
+    avatar = Image.fromarray(rng.integers(0, 256, (103, 103, 4), dtype=np.uint8), "RGBA")
+    for squares in (1, 16, 100, 400):
+        mosaic = PfpEffects.mosaic_effect(avatar, squares)
+        legacy = legacy_mosaic(avatar, squares)
+        assert mosaic.size == legacy.size
+        assert tiles(mosaic, squares) == tiles(legacy, squares)
+
+
+def test_spook_effects_match_uncached_overlays() -> None:
+    """Test that spook effects built from cached overlays match ones loading them every time, alone or combined."""
+    rng = np.random.default_rng(19)
+    avatar = Image.fromarray(rng.integers(0, 256, (256, 256, 4), dtype=np.uint8), "RGBA")
+    for name, legacy_effect, effect in COMPARISONS * 2:
+        random.seed(name)
+        expected = legacy_effect(avatar)
+        random.seed(name)
+        assert effect(avatar).tobytes() == expected.tobytes()
+
+    assert overlay("pentagram", (256, 256)) is overlay("pentagram", (256, 256))
+
+
+def test_animated_chunks_splice_into_one_gif() -> None:
+    """Test that GIFs rendered for chunks of an animation splice into one GIF with every sampled frame."""
+    frames = [Image.new("RGB", (64, 64), (index * 20, 100, 255 - index * 20)) for index in range(12)]
+    source = BytesIO()
+    frames[0].save(source, "GIF", save_all=True, append_images=frames[1:], duration=30, loop=0)
+
+    indices, durations = sample_frames(frame_durations(source.getvalue()), max_frames=6)
+    assert (indices, durations) == ([0, 2, 4, 6, 8, 10], [60] * 6)
+
+    chunks = render_chunks(
+        source.getvalue(),
+        PfpEffects.pridify_effect,
+        [(indices[:4], durations[:4]), (indices[4:], durations[4:])],
+        32,
+        8,
+        "gay",
+    )
+    assert chunks[1:] == render_chunks(
+        source.getvalue(), PfpEffects.pridify_effect, [(indices[4:], durations[4:])], 32, 8, "gay"
+    )
+    spliced = Image.open(BytesIO(splice_gifs(chunks)))
+    assert spliced.size == (32, 32)
+    assert [frame.info["duration"] for frame in ImageSequence.Iterator(spliced)] == durations
+
+    spliced.seek(3)
+    frame = spliced.convert("RGBA")
+    assert frame.getpixel((0, 0))[3] == 0
+    assert abs(frame.getpixel((16, 16))[0] - 6 * 20) <= 8
@@ -0,0 +1,97 @@
+import asyncio
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from bot.utils.cache import ByteCache, SingleFlight
+
+
+def test_byte_cache_evicts_least_recently_used_by_size() -> None:
+    """Test that the cache stays within its byte bound by evicting the least recently used entries."""
+    async def run() -> None:
+        cache = ByteCache(10)
+        await cache.put("a", b"aaaa")
+        await cache.put("b", b"bbbb")
+        assert await cache.get("a") == b"aaaa"
+
+        await cache.put("c", b"cccc")
+        assert "b" not in cache
+        assert await cache.get("a") == b"aaaa"
+        assert await cache.get("c") == b"cccc"
+        assert cache.size == 8
+
+        await cache.put("too big", b"x" * 11)
+        assert "too big" not in cache
+        assert (cache.hits, cache.misses) == (3, 0)
+
+    asyncio.run(run())
+
+
+def test_byte_cache_spills_evicted_entries_to_disk(tmp_path: Path) -> None:
+    """Test that evicted entries are spilled to disk, promoted back on a hit, and deleted past the spill bound."""
+    async def run() -> None:
+        cache = ByteCache(4, spill_dir=tmp_path, max_spill_bytes=8)
+        for key in ("a", "b", "c", "d"):
+            await cache.put(key, key.encode() * 4)
+
+        assert "a" not in cache
+        assert cache.spilled_size == 8
+        assert len(list(tmp_path.iterdir())) == 2
+
+        assert await cache.get("b") == b"bbbb"
+        assert await cache.get("d") == b"dddd"
+        assert cache.size == 4
+        assert await cache.get("a") is None
+
+        await cache.clear()
+        assert len(cache) == 0
+        assert not list(tmp_path.iterdir())
+
+    asyncio.run(run())
+
+
+def test_byte_cache_keeps_concurrent_spills_consistent(tmp_path: Path) -> None:
+    """Test that interleaved reads, writes and removals of spilled entries leave the cache and disk in step."""
+    async def run() -> None:
+        cache = ByteCache(4, spill_dir=tmp_path, max_spill_bytes=64)
+        await asyncio.gather(*(cache.put(key, key.encode() * 4) for key in "abcdefgh"))
+        results = await asyncio.gather(cache.get("a"), cache.pop("b"), cache.get("b"), cache.put("c", b"CCCC"))
+        assert results[0] == b"aaaa"
+        assert results[2] is None
+        assert await cache.get("c") == b"CCCC"
+
+        assert cache.size == sum(map(len, cache._entries.values()))
+        assert cache.spilled_size == 4 * len(cache._spilled) == 4 * len(list(tmp_path.iterdir()))
+
+    asyncio.run(run())
+
+
+def test_single_flight_shares_concurrent_calls_and_keeps_results() -> None:
+    """Test that concurrent calls for a key share one call, whose result is reused until it expires."""
+    calls = []
+
+    async def fetch(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        if key == "missing":
+            raise LookupError(key)
+        return key.upper()
+
+    async def run() -> None:
+        flight = SingleFlight(ttl=60)
+        results = await asyncio.gather(*(flight.run(key, partial(fetch, key)) for key in ("a", "a", "b", "a")))
+        assert results == ["A", "A", "B", "A"]
+        assert await flight.run("a", partial(fetch, "a")) == "A"
+        assert calls == ["a", "b"]
+
+        for _ in range(2):
+            with pytest.raises(LookupError):
+                await flight.run("missing", partial(fetch, "missing"))
+        assert calls == ["a", "b", "missing", "missing"]
+
+        flight.forget("a")
+        await flight.run("a", partial(fetch, "a"))
+        assert (flight.calls, flight.hits) == (5, 3)
+
+    asyncio.run(run())
@@ -0,0 +1,32 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from bot.utils.encoding import encode_image, file_extension
+
+
+def test_few_colours_are_encoded_as_exact_palette_png() -> None:
+    """Test that an image with few colours is stored as a palette PNG without changing any pixel."""
+    image = Image.new("RGB", (128, 128), (30, 60, 90))
+    image.paste((200, 10, 10), (0, 0, 64, 64))
+
+    encoded = encode_image(image)
+    assert (encoded.format, encoded.extension) == ("PNG", ".png")
+    decoded = Image.open(BytesIO(encoded.data))
+    assert decoded.mode == "P"
+    assert decoded.convert("RGB").tobytes() == image.tobytes()
+
+
+def test_large_photos_fall_back_to_webp() -> None:
+    """Test that photos too large for the byte budget as PNGs are encoded as WebP, keeping the smallest result."""
+    rng = np.random.default_rng(17)
+    image = Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8), "RGB")
+
+    encoded = encode_image(image, max_bytes=1024)
+    assert (encoded.format, encoded.extension) == ("WEBP", ".webp")
+    assert encoded.attempts == 4
+    assert Image.open(BytesIO(encoded.data)).size == (256, 256)
+
+    assert encode_image(image, max_bytes=1024, max_seconds=0).format == "PNG"
+    assert file_extension(b"GIF89a") == ".gif"
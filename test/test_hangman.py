@@ -1,4 +1,23 @@
+import asyncio
+import itertools
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from redis import RedisError
+
+from benchmarks.hangman_load import run_load_test
 from bot.exts.fun.hangman import Hangman
+from bot.exts.fun.hangman._images import render_gallows
+from bot.exts.fun.hangman._sessions import SessionRegistry
+from bot.exts.fun.hangman._solver import difficulty_views, score_words
+from bot.exts.fun.hangman._state import HangmanState
+from bot.exts.fun.hangman._stats import HangmanStats
+from bot.exts.fun.hangman._words import WordCorpus, WordIndex, load_words
+from bot.utils.messages import MessageUpdater
+from bot.utils.resources import LazyResource
+from test.fakes import FakeChannel, FakeContext, FakeRedisSession, FakeUser
 # Need to export the tokens first and then run the tests
 # Easier tests
 
@@ -45,3 +64,216 @@ def test_parse_arguments_edge_case_unique_letters() -> None:
 def test_parse_arguments_full_custom_range() -> None:
     """Test that a full custom range is correctly parsed."""
     assert Hangman.parse_arguments(("5", "10", "2", "8")) == (None, {"min_length": 5, "max_length": 10, "min_unique_letters": 2, "max_unique_letters": 8}, None)
+
+
+def test_word_index_count_matches_filter() -> None:
+    """Test that the word index counts the same words as a plain filter over the words."""
+    words = ["cat", "dog", "tree", "apple", "banana", "a", "cat"]
+    index = WordIndex.from_words(words)
+    for bounds in ((0, 25, 0, 25), (3, 4, 0, 3), (5, 6, 3, 4), (2, 2, 0, 25), (0, 1000000, 4, 25)):
+        expected = {
+            word for word in words
+            if bounds[0] <= len(word) <= bounds[1] and bounds[2] <= len(set(word)) <= bounds[3]
+        }
+        assert index.count(*bounds) == len(expected)
+
+def test_word_index_sample_within_bounds() -> None:
+    """Test that sampled words always satisfy the requested ranges."""
+    index = WordIndex.from_words(["cat", "dog", "tree", "apple", "banana"])
+    for _ in range(50):
+        word = index.sample(min_length=4, max_length=6, min_unique_letters=3, max_unique_letters=4)
+        assert word in {"tree", "apple", "banana"}
+
+def test_word_index_sample_no_match() -> None:
+    """Test that sampling an empty range returns None."""
+    index = WordIndex.from_words(["cat", "dog"])
+    assert index.sample(min_length=5, max_length=8, min_unique_letters=0, max_unique_letters=25) is None
+    assert index.sample(min_length=0, max_length=8, min_unique_letters=30, max_unique_letters=40) is None
+
+def test_word_corpus_views_share_store() -> None:
+    """Test that preset views resolve to words stored once in the corpus."""
+    corpus = WordCorpus(["apple", "tree", "cat"], views={"easy": ["cat", "dog"]})
+    assert len(corpus) == 4
+    assert [corpus[word_id] for word_id in corpus.views["easy"]] == ["cat", "dog"]
+    assert corpus.choice("easy") in {"cat", "dog"}
+    assert list(corpus.unique_letters) == [3, 3, 4, 3]
+
+def test_words_load_lazily_independent_of_cwd(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the word resource loads once, from any working directory."""
+    monkeypatch.chdir(tmp_path)
+    resource = LazyResource(load_words)
+    assert not resource.loaded
+
+    async def load_twice() -> tuple[WordIndex, WordIndex]:
+        return await asyncio.gather(resource.get(), resource.get())
+
+    first, second = asyncio.run(load_twice())
+    assert first is second
+    assert resource.loaded
+    assert first.corpus.choice("easy") in {first.corpus[word_id] for word_id in first.corpus.views["easy"]}
+
+def test_session_registry_routes_by_channel_and_author() -> None:
+    """Test that messages reach only the game of their author in their channel, and sessions close cleanly."""
+    registry = SessionRegistry()
+
+    def message(channel_id: int, author_id: int) -> SimpleNamespace:
+        return SimpleNamespace(channel=SimpleNamespace(id=channel_id), author=SimpleNamespace(id=author_id))
+
+    with registry.open(1, 10) as guesses:
+        assert registry.dispatch(message(1, 10))
+        assert not registry.dispatch(message(1, 11))
+        assert not registry.dispatch(message(2, 10))
+        assert guesses.qsize() == 1
+        with pytest.raises(KeyError):
+            registry.open(1, 10).__enter__()
+
+    assert (1, 10) not in registry
+    assert not registry.dispatch(message(1, 10))
+
+def test_hangman_state_reveals_and_wins() -> None:
+    """Test that guesses reveal every position of a letter and that revealing all letters wins."""
+    state = HangmanState("banana")
+    assert state.progress == "_ _ _ _ _ _"
+    assert state.guess("a")
+    assert state.progress == "_ a _ a _ a"
+    assert not state.guess("z")
+    assert state.tries == 5
+    assert state.guess("b")
+    assert state.guess("n")
+    assert state.won
+    assert state.progress == "b a n a n a"
+    assert state.guessed == {"a", "b", "n", "z"}
+
+def test_hangman_state_loses_after_wrong_guesses() -> None:
+    """Test that running out of tries loses the game."""
+    state = HangmanState("cat", tries=2)
+    state.guess("x")
+    assert not state.lost
+    state.guess("y")
+    assert state.lost
+    assert not state.won
+
+def test_message_updater_coalesces_edits() -> None:
+    """Test that a burst of updates is sent as a single edit carrying the latest state."""
+    edits = []
+
+    async def edit(**fields) -> None:
+        edits.append(fields)
+
+    async def burst() -> MessageUpdater:
+        updater = MessageUpdater(SimpleNamespace(id=1, edit=edit), delay=0.05)
+        for tries in range(6, 0, -1):
+            updater.update(content=str(tries))
+        await updater.flush()
+        return updater
+
+    updater = asyncio.run(burst())
+    assert edits == [{"content": "1"}]
+    assert updater.edits_sent == 1
+    assert updater.updates_coalesced == 5
+
+def test_solver_scores_words() -> None:
+    """Test that the solver counts guesses and misses, and that words it can't tell apart cost more."""
+    guesses, misses = score_words(["cat", "cot", "cut", "dog"])
+    # "c" and "t" are the most common letters, then the vowels are tried in alphabetical order.
+    assert (guesses[0], misses[0]) == (3, 0)
+    assert (guesses[1], misses[1]) == (4, 1)
+    assert (guesses[2], misses[2]) == (5, 2)
+    assert misses[3] == 1
+
+def test_difficulty_views_split_by_percentile() -> None:
+    """Test that difficulties are ordered from the fewest to the most misses."""
+    views = difficulty_views(guesses=[5, 5, 5, 5, 5, 5], misses=[3, 0, 5, 1, 4, 2])
+    assert list(views["easy"]) == [1, 3]
+    assert list(views["medium"]) == [5, 0]
+    assert list(views["hard"]) == [4, 2]
+
+def test_load_harness_plays_concurrent_games() -> None:
+    """Test that concurrent games driven through the fake gateway all finish, and each guess is answered quickly."""
+    report = asyncio.run(run_load_test(50, "easy"))
+    summary = report.summary()
+    assert summary["won"] + summary["lost"] == 50
+    assert report.guesses >= 50
+    # Generous bound: this guards against a hot path turning pathologically slow, not against noise.
+    assert summary["guess p99 ms"] < 250
+
+def test_stats_are_batched_into_redis() -> None:
+    """Test that buffered results are visible before and after a flush, and feed the leaderboard."""
+    async def play() -> tuple:
+        stats = HangmanStats(FakeRedisSession(), batch_size=100)
+        stats.record(1, won=True, guesses=8)
+        stats.record(1, won=True, guesses=6)
+        stats.record(2, won=True, guesses=9)
+        stats.record(1, won=False, guesses=12)
+        stats.record(1, won=True, guesses=7)
+        before_flush = await stats.get(1)
+        await stats.flush()
+        return before_flush, await stats.get(1), await stats.leaderboard()
+
+    before_flush, after_flush, leaderboard = asyncio.run(play())
+    assert before_flush == after_flush
+    assert (after_flush.wins, after_flush.losses, after_flush.streak, after_flush.best_streak) == (3, 1, 1, 2)
+    assert after_flush.average_guesses == 8.25
+    assert leaderboard == [(1, 3), (2, 1)]
+
+def test_failed_stats_flushes_are_retried_with_backoff() -> None:
+    """Test that results that couldn't be written are retried on their own, until Redis is back."""
+    async def play() -> tuple:
+        session = FakeRedisSession()
+        pipeline = session.client.pipeline
+        attempts = []
+
+        def flaky_pipeline(*args, **kwargs) -> object:
+            attempts.append(asyncio.get_running_loop().time())
+            if len(attempts) <= 3:
+                raise RedisError("Redis is down.")
+            return pipeline(*args, **kwargs)
+
+        session.client.pipeline = flaky_pipeline
+        stats = HangmanStats(session, flush_interval=0.01)
+        stats.record(1, won=True, guesses=5)
+        await asyncio.sleep(0.3)
+        return attempts, stats._pending, await stats.get(1)
+
+    attempts, pending, player = asyncio.run(play())
+    # Three failed attempts, then one to read the players' records and one to write them back
+    assert len(attempts) == 5
+    waits = [later - earlier for earlier, later in itertools.pairwise(attempts[:4])]
+    assert waits[0] < waits[2]
+    assert not pending
+    assert (player.wins, player.guesses) == (1, 5)
+
+def test_gallows_images_are_rendered_once_per_stage() -> None:
+    """Test that every stage is a distinct PNG."""
+    stages = render_gallows()
+    assert len(stages) == 7
+    assert len(set(stages)) == 7
+    assert all(stage.startswith(b"\x89PNG") for stage in stages)
+
+
+def test_gallows_are_only_uploaded_when_they_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that edits only attach the gallows after a wrong guess, and rejected messages don't edit at all."""
+    updates = []
+
+    class RecordingUpdater:
+        def __init__(self, _message: object):
+            pass
+
+        def update(self, **fields) -> None:
+            updates.append(sorted(fields))
+
+        async def flush(self) -> None:
+            pass
+
+    async def play() -> None:
+        cog = Hangman(bot=None)
+        cog.stats = HangmanStats(FakeRedisSession())
+        guesses = asyncio.Queue()
+        for content in ("c", "cc", "z", "a", "t"):
+            guesses.put_nowait(SimpleNamespace(content=content))
+        await cog._play(FakeContext(FakeChannel(Counter()), FakeUser()), "cat", "easy", guesses)
+
+    monkeypatch.setattr("bot.exts.fun.hangman._cog.MessageUpdater", RecordingUpdater)
+    asyncio.run(play())
+    with_gallows, without_gallows = ["attachments", "embed"], ["embed"]
+    assert updates == [with_gallows, without_gallows, with_gallows, without_gallows, without_gallows]
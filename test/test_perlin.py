@@ -0,0 +1,49 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmarks.perlin import shared_gradients
+from bot.exts.fun.snakes._utils import PerlinNoise, PerlinNoiseFactory, render_snek_frames, snek_animation_paths
+from bot.utils.gif import splice_gifs
+
+
+@pytest.mark.parametrize("dimension", [1, 2, 3])
+def test_perlin_noise_matches_scalar_implementation(dimension: int) -> None:
+    """Test that array based noise matches the scalar factory it replaced, given the same gradients."""
+    points = np.random.default_rng(dimension).uniform(-300, 300, (200, dimension))
+    noise = PerlinNoise(dimension, octaves=3, seed=dimension)
+    factory = shared_gradients(noise, points)
+
+    assert np.allclose(noise(points), [factory(*point) for point in points.tolist()])
+    assert np.allclose(noise.plain_noise(np.floor(points)), 0)
+
+
+def test_perlin_noise_is_seeded_and_wrapped_for_single_points() -> None:
+    """Test that a seed fixes the noise, and that the factory gives the same values one point at a time."""
+    points = np.linspace(-2, 2, 50)
+    assert np.array_equal(PerlinNoise(1, seed=7)(points), PerlinNoise(1, seed=7)(points))
+    assert not np.array_equal(PerlinNoise(1, seed=7)(points), PerlinNoise(1, seed=8)(points))
+
+    factory = PerlinNoiseFactory(2, octaves=2, tile=(0, 3), unbias=True, seed=7)
+    assert factory(1.25, 0.5) == factory(1.25, 3.5) == factory.noise([(1.25, 0.5)])[0]
+    with pytest.raises(ValueError):
+        factory(1.0)
+
+
+def test_snek_animation_loops_and_renders_every_frame() -> None:
+    """Test that animated snek paths keep their segment lengths and loop, and that their frames splice into a GIF."""
+    segment_lengths = np.full(15, 8.0)
+    paths = snek_animation_paths(PerlinNoise(3, octaves=2, seed=22), segment_lengths, 24)
+    assert paths.shape == (24, 16, 2)
+    assert np.allclose(np.linalg.norm(np.diff(paths, axis=1), axis=-1), 8.0)
+    # Each frame moves the snek less than the whole loop does, including from the last frame back to the first.
+    steps = np.abs(np.diff(np.concatenate((paths, paths[:1])), axis=0)).max(axis=(1, 2))
+    assert steps.max() < np.abs(paths - paths[0]).max() / 2
+
+    style = (0x15C7EA, (40, 45, 60), 8, "snek", (10, 10), 0xF2EA15)
+    chunks = [render_snek_frames(paths[start:start + 12], (200, 200), 80, *style) for start in (0, 12)]
+    gif = Image.open(BytesIO(splice_gifs(chunks)))
+    assert (gif.n_frames, gif.info["loop"]) == (24, 0)
+    assert gif.convert("RGB").getpixel((0, 0)) == (40, 45, 60)
@@ -0,0 +1,199 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import zipfile
+from io import BytesIO
+from types import SimpleNamespace
+
+import discord
+import pytest
+from PIL import Image
+
+from bot.exts.avatar_modification._batch import BatchReport, BatchUploader, render_batch
+from bot.exts.avatar_modification._effects import PfpEffects
+from bot.utils.exceptions import RenderBusyError, RenderTimeoutError
+from bot.utils.render import RenderService
+
+
+def test_render_service_runs_effects_in_worker_processes() -> None:
+    """Test that an avatar effect renders in a worker process and its PNG comes back."""
+    async def render() -> bytes:
+        service = RenderService(max_workers=1)
+        avatar = BytesIO()
+        Image.new("RGBA", (32, 32), (255, 0, 0, 255)).save(avatar, "PNG")
+        try:
+            encoded = await service.run(PfpEffects.apply_effect, avatar.getvalue(), PfpEffects.flip_effect)
+            return encoded.data
+        finally:
+            await service.shutdown()
+
+    assert Image.open(BytesIO(asyncio.run(render()))).size == (1024, 1024)
+
+
+def test_render_service_limits_pending_jobs_and_times_out() -> None:
+    """Test that jobs past the pending limit are refused, and that slow jobs time out but count until they end."""
+    async def overload() -> None:
+        service = RenderService(max_workers=1, max_pending=1, timeout=5.0)
+        try:
+            with pytest.raises(RenderTimeoutError):
+                await service.run(time.sleep, 1.0, timeout=0.1)
+            assert service.pending == 1
+            with pytest.raises(RenderBusyError):
+                await service.run(time.sleep, 0.0)
+
+            while service.pending:
+                await asyncio.sleep(0.05)
+            await service.run(time.sleep, 0.0)
+        finally:
+            await service.shutdown()
+
+        with pytest.raises(RuntimeError):
+            await service.run(time.sleep, 0.0)
+
+    asyncio.run(overload())
+
+
+def test_render_service_recovers_from_workers_dying() -> None:
+    """Test that jobs lost with a dead worker are refused as busy, and that the next job gets a fresh pool."""
+    async def crash() -> None:
+        service = RenderService(max_workers=1)
+        try:
+            await service.run(time.sleep, 0.0)
+            broken = service._executor
+            with pytest.raises(RenderBusyError):
+                await service.run(os._exit, 1)
+            assert service._executor is not broken
+
+            await service.run(time.sleep, 0.0)
+            assert service.pending == 0
+        finally:
+            await service.shutdown()
+
+    asyncio.run(crash())
+
+
+def test_render_service_shutdown_only_terminates_its_own_workers() -> None:
+    """Test that workers still running at the end of a shutdown are terminated, and other child processes aren't."""
+    async def shut_down(other: multiprocessing.Process) -> None:
+        service = RenderService(max_workers=1, timeout=0.5)
+        hung = asyncio.create_task(service.run(time.sleep, 30, timeout=60))
+        await asyncio.sleep(1.0)
+        workers = list(service._executor._processes.values())
+
+        await service.shutdown()
+        await asyncio.sleep(0.2)
+        assert not any(worker.is_alive() for worker in workers)
+        assert other.is_alive()
+        hung.cancel()
+
+    other = multiprocessing.get_context("spawn").Process(target=time.sleep, args=(30,))
+    other.start()
+    try:
+        asyncio.run(shut_down(other))
+    finally:
+        other.terminate()
+        other.join()
+
+
+def test_background_jobs_leave_a_worker_for_other_jobs() -> None:
+    """Test that background jobs wait for their own slots, so other jobs run while they're queued."""
+    async def run() -> None:
+        service = RenderService(max_workers=2)
+        try:
+            background = [asyncio.create_task(service.run(time.sleep, 0.5, background=True)) for _ in range(3)]
+            await asyncio.sleep(0.1)
+            assert service.pending == 1
+
+            await service.run(time.sleep, 0.0)
+            assert not any(task.done() for task in background)
+            await asyncio.gather(*background)
+        finally:
+            await service.shutdown()
+
+    asyncio.run(run())
+
+
+def test_background_jobs_wait_for_room_under_the_pending_limit() -> None:
+    """Test that background jobs wait while the service has as many pending jobs as it accepts."""
+    async def run() -> None:
+        service = RenderService(max_workers=2, max_pending=1)
+        try:
+            command = asyncio.create_task(service.run(time.sleep, 0.3))
+            await asyncio.sleep(0.1)
+            background = asyncio.create_task(service.run(time.sleep, 0.0, background=True))
+            await asyncio.sleep(0.1)
+            assert service.pending == 1
+            assert not background.done()
+
+            await asyncio.gather(command, background)
+            assert service.pending == 0
+        finally:
+            await service.shutdown()
+
+    asyncio.run(run())
+
+
+def test_batches_render_every_avatar_and_upload_them_in_archives() -> None:
+    """Test that a batch renders each avatar it can, and uploads them in zip archives once there are many."""
+    async def read(avatar: bytes | None) -> bytes:
+        if avatar is None:
+            raise RuntimeError("The download went wrong.")
+        return avatar
+
+    class Channel:
+        def __init__(self):
+            self.files = []
+
+        async def send(self, file: discord.File) -> None:
+            self.files.append(file)
+
+    avatar = BytesIO()
+    Image.new("RGBA", (32, 32), (0, 128, 255, 255)).save(avatar, "PNG")
+    avatars = [(f"avatar_{index}.png", avatar.getvalue()) for index in range(12)]
+    avatars += [("broken.png", b"not an image"), ("missing.png", None)]
+
+    async def run() -> BatchReport:
+        service = RenderService(max_workers=2)
+        try:
+            return await render_batch(service, avatars, PfpEffects.flip_effect, read=read, upload=uploader.add)
+        finally:
+            await service.shutdown()
+
+    channel = Channel()
+    uploader = BatchUploader(channel, "flipped", 1024 * 1024)
+    report = asyncio.run(run())
+    asyncio.run(uploader.finish())
+
+    assert (report.rendered, report.failed, uploader.messages) == (12, 2, 1)
+    with zipfile.ZipFile(channel.files[0].fp) as archive:
+        assert sorted(archive.namelist()) == sorted(name for name, _ in avatars[:-2])
+
+
+def test_batches_count_failed_uploads_and_carry_on() -> None:
+    """Test that an avatar Discord refuses to take is counted as a failure without stopping the batch."""
+    async def read(avatar: bytes) -> bytes:
+        return avatar
+
+    uploaded = []
+
+    async def upload(name: str, image: bytes) -> None:
+        if name == "too_large.png":
+            raise discord.HTTPException(SimpleNamespace(status=413, reason="Payload Too Large"), "Too large.")
+        uploaded.append(name)
+
+    avatar = BytesIO()
+    Image.new("RGBA", (32, 32), (0, 128, 255, 255)).save(avatar, "PNG")
+    avatars = [(name, avatar.getvalue()) for name in ("first.png", "too_large.png", "last.png")]
+
+    async def run() -> BatchReport:
+        service = RenderService(max_workers=1)
+        try:
+            return await render_batch(service, avatars, PfpEffects.flip_effect, read=read, upload=upload)
+        finally:
+            await service.shutdown()
+
+    report = asyncio.run(run())
+
+    assert (report.rendered, report.failed) == (2, 1)
+    assert sorted(uploaded) == ["first.png", "last.png"]
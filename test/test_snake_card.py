@@ -0,0 +1,15 @@
+import random
+
+from benchmarks.snake_card import INFO, legacy_card, sample_picture
+from bot.exts.fun.snakes._card import CARD, compose_card
+
+
+def test_cards_from_cached_layers_match_cards_built_from_scratch() -> None:
+    """Test that cards composited from cached layers and text match ones built layer by layer, for each back."""
+    for size in ((300, 200), (347, 900), (200, 600)):
+        picture = sample_picture(size, seed=23)
+        for seed in range(len(CARD["backs"]) * 2):
+            random.seed(seed)
+            expected = legacy_card(picture, INFO)
+            random.seed(seed)
+            assert compose_card(picture, INFO).tobytes() == expected.tobytes()
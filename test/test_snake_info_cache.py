@@ -0,0 +1,59 @@
+import asyncio
+
+from bot.exts.fun.snakes._wiki_cache import SnakeInfoCache
+from test.fakes import FakeRedisSession
+
+
+class Wikipedia:
+    """Counts the fetches of each snake, answering them after a short delay."""
+
+    def __init__(self):
+        self.fetches = []
+
+    async def fetch(self, name: str) -> dict | None:
+        """Fetch a snake, which has no article if it's called "nope", and fails if it's called "broken"."""
+        self.fetches.append(name)
+        fetch = len(self.fetches)
+        await asyncio.sleep(0.01)
+        if name == "nope":
+            return None
+        if name == "broken":
+            return {"error": True}
+        return {"name": name, "fetch": fetch}
+
+
+def test_snake_info_is_fetched_once_and_cached() -> None:
+    """Test that concurrent lookups share a fetch, and that articles and missing ones are cached, but errors not."""
+    async def run() -> None:
+        wikipedia = Wikipedia()
+        cache = SnakeInfoCache(wikipedia.fetch, FakeRedisSession())
+        results = await asyncio.gather(*(cache.get(name) for name in ("Boa", "boa", "nope", "broken", "Boa")))
+        assert results == [{"name": "Boa", "fetch": 1}] * 2 + [None, {"error": True}, {"name": "Boa", "fetch": 1}]
+
+        assert await cache.get("BOA") == {"name": "Boa", "fetch": 1}
+        assert await cache.get("nope") is None
+        await cache.get("broken")
+        assert wikipedia.fetches == ["Boa", "nope", "broken", "broken"]
+
+    asyncio.run(run())
+
+
+def test_stale_snake_info_is_served_while_refreshing_and_prewarmed() -> None:
+    """Test that stale entries are served at once and refreshed in the background, and that prewarming fills gaps."""
+    async def run() -> None:
+        wikipedia = Wikipedia()
+        session = FakeRedisSession()
+        stale = SnakeInfoCache(wikipedia.fetch, session, fresh_seconds=0)
+        assert await stale.get("Boa") == {"name": "Boa", "fetch": 1}
+        assert await stale.get("Boa") == {"name": "Boa", "fetch": 1}
+        await asyncio.sleep(0.05)
+        assert await stale.get("Boa") == {"name": "Boa", "fetch": 2}
+        await asyncio.sleep(0.05)
+
+        cache = SnakeInfoCache(wikipedia.fetch, session)
+        # Failed fetches aren't cached, so they aren't counted, but snakes without an article are
+        assert await cache.prewarm(["Boa", "Python", "python", "Mamba", "broken", "nope"]) == 3
+        assert await cache.prewarm(["Boa", "Python", "Mamba", "nope"]) == 0
+        assert wikipedia.fetches == ["Boa", "Boa", "Boa", "Python", "Mamba", "broken", "nope"]
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+import pytest
+from rapidfuzz.utils import default_process
+
+from benchmarks.snake_names import QUERIES, legacy_find, load_snakes
+from bot.exts.fun.snakes._converter import SnakeNameIndex
+
+SNAKES = load_snakes()
+
+
+@pytest.fixture(scope="module")
+def index() -> SnakeNameIndex:
+    """Index the names of the snakes the converter resolves."""
+    return SnakeNameIndex(SNAKES)
+
+
+def test_exact_names_and_word_prefixes(index: SnakeNameIndex) -> None:
+    """Test that a name resolves to itself alone, and a prefix of any of its words resolves to it first."""
+    assert index.find("KING COBRA") == ["King cobra"]
+    assert index.find("black necked spitting cobra") == ["Black-necked spitting cobra"]
+
+    assert "King cobra" in index.find("king")
+    assert "King cobra" in index.find("cob")
+    boas = index.find("boa")
+    word_starts = [any(word.startswith("boa") for word in default_process(name).split()) for name in boas]
+    assert word_starts == sorted(word_starts, reverse=True)
+    assert set(index.find("spitting")) <= set(index.find("spitt"))
+    assert index.find("") == index.find("!?") == []
+
+
+@pytest.mark.parametrize("query", QUERIES["typo"])
+def test_fuzzy_matches_agree_with_scoring_every_name(index: SnakeNameIndex, query: str) -> None:
+    """Test that misspelt names offer the same names as scoring each one did."""
+    found = index.find(query)
+    assert found
+    assert set(found) == set(legacy_find(SNAKES, query))
+    assert index.find(query.upper()) == found
+
+
+@pytest.mark.parametrize("query", (*QUERIES["prefix"], "pitviper", "boa"))
+def test_prefix_matches_agree_with_scoring_every_name(index: SnakeNameIndex, query: str) -> None:
+    """Test that prefixes offer the same names as scoring each one did, not just those with a word starting so."""
+    assert set(index.find(query)) == set(legacy_find(SNAKES, query))